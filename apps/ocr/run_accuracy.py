@@ -0,0 +1,20 @@
+"""
+Entry point for the precision-mode accuracy harness.
+Measures field accuracy and latency per mode on a labeled image set.
+
+Usage:
+    python run_accuracy.py /data/labeled_ids
+    python run_accuracy.py /data/labeled_ids --modes fp32,int8 --max-accuracy-drop 0.005
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.tools.accuracy import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Entry point for inference autotuning.
+Sweeps OpenVINO/PaddleOCR settings on this machine and writes the best config.
+
+Usage:
+    python run_autotune.py --target latency
+    python run_autotune.py --target throughput --latency-budget-ms 250
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.tools.autotune import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Entry point for offline bulk processing.
+Backfills archived ID scans to JSONL without going through RabbitMQ.
+
+Usage:
+    python run_bulk.py /data/id_scans --output results.jsonl --workers 4
+    python run_bulk.py /data/id_scans.zip --output results.jsonl
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.tools.bulk_processor import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+Entry point for ID card template calibration.
+Derives the field regions used by the template-geometry fast path.
+
+Usage:
+    python run_calibrate_template.py /data/aligned_id_fronts
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.tools.calibrate_template import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Entry point for INT8 post-training quantization.
+Writes <model>_int8.xml next to each OpenVINO model; enable it with
+CLASS_MODEL_PRECISION=int8 / ID_MODEL_PRECISION=int8.
+
+Usage:
+    python run_quantize.py /data/calibration_ids
+    python run_quantize.py /data/calibration_ids --models ID_MODEL
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.tools.quantize import main
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
 """Configuration package"""
-from .logger import logger, setup_logging
+from .logger import logger, setup_logging, log_context, stop_logging
+from .inference import (get_openvino_config, get_ocr_config,
+                        get_precision_mode, PRECISION_MODES, CLASS_MODEL_KEY,
+                        ID_MODEL_KEY, OCR_KEY)
 
-__all__ = ['logger', 'setup_logging']
+__all__ = [
+    'logger', 'setup_logging', 'log_context', 'stop_logging',
+    'get_openvino_config', 'get_ocr_config', 'get_precision_mode',
+    'PRECISION_MODES', 'CLASS_MODEL_KEY', 'ID_MODEL_KEY', 'OCR_KEY'
+]
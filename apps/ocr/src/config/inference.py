@@ -0,0 +1,141 @@
+"""
+Inference engine configuration for Egyptian ID OCR service
+OpenVINO compile properties per model and PaddleOCR thread limits
+"""
+import os
+import json
+from pathlib import Path
+from typing import Dict
+from .logger import logger
+
+# OpenVINO properties that can be tuned, mapped to their env var suffix
+# Global default: OV_<SUFFIX>, per-model override: <MODEL_KEY>_OV_<SUFFIX>
+OPENVINO_PROPERTIES = {
+    'PERFORMANCE_HINT': 'PERFORMANCE_HINT',
+    'NUM_STREAMS': 'NUM_STREAMS',
+    'INFERENCE_NUM_THREADS': 'INFERENCE_NUM_THREADS',
+    'ENABLE_CPU_PINNING': 'ENABLE_CPU_PINNING',
+    'INFERENCE_PRECISION_HINT': 'PRECISION_HINT',
+}
+
+# Model keys used in env vars and in the tuned config file
+CLASS_MODEL_KEY = 'CLASS_MODEL'
+ID_MODEL_KEY = 'ID_MODEL'
+OCR_KEY = 'OCR'
+
+# Execution precision modes (<MODEL_KEY>_PRECISION). fp16/bf16 set the
+# CPU inference precision hint; int8 loads the post-training quantized IR
+PRECISION_MODES = ('fp32', 'fp16', 'bf16', 'int8')
+_PRECISION_HINTS = {'fp32': 'f32', 'fp16': 'f16', 'bf16': 'bf16'}
+
+_BOOLEAN_PROPERTIES = {'ENABLE_CPU_PINNING'}
+_UPPERCASE_PROPERTIES = {'PERFORMANCE_HINT', 'NUM_STREAMS'}
+
+
+def resolve_config_file() -> Path:
+    """
+    Path of the tuned config file written by the autotune tool
+    (OV_CONFIG_FILE, relative paths are resolved against the ocr/ root)
+    """
+    config_file = os.getenv('OV_CONFIG_FILE', 'models/inference_config.json')
+    if os.path.isabs(config_file):
+        return Path(config_file)
+    ocr_root = Path(__file__).resolve().parent.parent.parent
+    return (ocr_root / config_file).resolve()
+
+
+def load_config_file() -> Dict:
+    """Load the tuned config file, or an empty config if it does not exist"""
+    config_path = resolve_config_file()
+    if not config_path.exists():
+        return {}
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring invalid inference config {config_path}: {e}")
+        return {}
+
+
+def _normalize_property(name: str, value) -> str:
+    """Normalize a property value to the string form OpenVINO accepts"""
+    value = str(value).strip()
+    if name in _BOOLEAN_PROPERTIES:
+        return 'YES' if value.lower() in ('1', 'true', 'yes', 'on') else 'NO'
+    if name in _UPPERCASE_PROPERTIES:
+        return value.upper()
+    if name == 'INFERENCE_PRECISION_HINT':
+        return value.lower()
+    return value
+
+
+def get_openvino_config(model_key: str) -> Dict[str, str]:
+    """
+    Build the OpenVINO compile config for a model
+
+    Precedence: <MODEL_KEY>_PRECISION mode (precision hint only) >
+    <MODEL_KEY>_OV_<PROP> env > OV_<PROP> env > tuned config file
+
+    Args:
+        model_key: CLASS_MODEL_KEY or ID_MODEL_KEY
+
+    Returns:
+        dict: OpenVINO property name -> value (only explicitly set properties)
+    """
+    config = {}
+    file_config = load_config_file().get(model_key, {})
+    for name, value in file_config.items():
+        if name in OPENVINO_PROPERTIES:
+            config[name] = _normalize_property(name, value)
+
+    for name, suffix in OPENVINO_PROPERTIES.items():
+        value = os.getenv(f'{model_key}_OV_{suffix}') or os.getenv(
+            f'OV_{suffix}')
+        if value:
+            config[name] = _normalize_property(name, value)
+
+    precision_hint = _PRECISION_HINTS.get(get_precision_mode(model_key))
+    if precision_hint:
+        config['INFERENCE_PRECISION_HINT'] = precision_hint
+
+    return config
+
+
+def get_precision_mode(model_key: str) -> str:
+    """
+    Execution precision mode of a model (<MODEL_KEY>_PRECISION env)
+
+    Returns:
+        str: One of PRECISION_MODES, or '' when not set (plugin default)
+    """
+    mode = os.getenv(f'{model_key}_PRECISION', '').strip().lower()
+    if mode and mode not in PRECISION_MODES:
+        logger.warning(f"Unknown {model_key}_PRECISION '{mode}', ignoring")
+        return ''
+    return mode
+
+
+def get_ocr_config() -> Dict:
+    """
+    Build PaddleOCR engine kwargs (thread limits)
+
+    Env: OCR_CPU_THREADS, OCR_ENABLE_MKLDNN (override the tuned config file)
+
+    Returns:
+        dict: Keyword arguments for the PaddleOCR constructor
+    """
+    config = {}
+    file_config = load_config_file().get(OCR_KEY, {})
+    if 'cpu_threads' in file_config:
+        config['cpu_threads'] = int(file_config['cpu_threads'])
+    if 'enable_mkldnn' in file_config:
+        config['enable_mkldnn'] = bool(file_config['enable_mkldnn'])
+
+    cpu_threads = os.getenv('OCR_CPU_THREADS')
+    if cpu_threads:
+        config['cpu_threads'] = int(cpu_threads)
+    enable_mkldnn = os.getenv('OCR_ENABLE_MKLDNN')
+    if enable_mkldnn:
+        config['enable_mkldnn'] = enable_mkldnn.lower() in ('1', 'true',
+                                                            'yes', 'on')
+    return config
@@ -2,16 +2,173 @@
 Logging configuration for Egyptian ID OCR service
 """
 import os
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
+import contextvars
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+# Structured fields attached to every record logged in the current context
+_LOG_CONTEXT = contextvars.ContextVar('log_context', default={})
+
+# Background listener used in async mode (None in sync mode)
+_LISTENER = None
+_QUEUE_HANDLER = None
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attach structured fields (e.g. request_id) to every record logged
+    inside the block, including from functions it calls
+    """
+    token = _LOG_CONTEXT.set({**_LOG_CONTEXT.get(), **fields})
+    try:
+        yield
+    finally:
+        _LOG_CONTEXT.reset(token)
+
+
+class ContextFieldsFilter(logging.Filter):
+    """
+    Merge context fields and per-call fields (extra={'fields': {...}})
+    into record.fields. Runs on the calling thread, where the context lives.
+    """
+
+    def filter(self, record):
+        context = _LOG_CONTEXT.get()
+        fields = getattr(record, 'fields', None)
+        if context or fields:
+            record.fields = {**context, **(fields or {})}
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """Text formatter that appends structured fields, or a JSON formatter"""
+
+    def __init__(self, fmt=None, datefmt=None, json_format=False):
+        super().__init__(fmt, datefmt)
+        self.json_format = json_format
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None)
+        if self.json_format:
+            entry = {
+                'time': self.formatTime(record, self.datefmt),
+                'level': record.levelname,
+                'logger': record.name,
+                'line': record.lineno,
+                'message': record.getMessage(),
+                **(fields or {})
+            }
+            if record.exc_info and not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            if record.exc_text:
+                entry['exception'] = record.exc_text
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        return super().format(record)
+
+    def formatMessage(self, record):
+        # Fields go on the message line, before any traceback
+        message = super().formatMessage(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += ' | ' + ' '.join(f'{k}={v}' for k, v in fields.items())
+        return message
+
+
+class DailyFileHandler(logging.FileHandler):
+    """
+    File handler writing to <log_dir>/<YYYY-MM-DD><suffix>.log
+    Switches to a new file when the date changes, so long-running processes
+    do not keep appending to the file named at startup. Files are never
+    renamed, which keeps it safe for forked workers sharing the directory.
+    """
+
+    def __init__(self, log_path: Path, suffix: str = ''):
+        self.log_path = log_path
+        self.suffix = suffix
+        self.current_date = datetime.now().strftime('%Y-%m-%d')
+        super().__init__(self._file_for(self.current_date), encoding='utf-8')
+
+    def _file_for(self, date: str) -> Path:
+        return self.log_path / f"{date}{self.suffix}.log"
+
+    def emit(self, record):
+        date = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d')
+        if date != self.current_date:
+            self.current_date = date
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(self._file_for(date))
+        super().emit(record)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener thread.
+    The message is merged with its args and any exception is rendered on
+    the calling thread, so later mutation of the args cannot change the
+    record and no traceback (with its frames) outlives the call. Only the
+    Formatter work (layout, asctime, fields) and the I/O are deferred.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(
+                    record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _start_listener(handlers):
+    """Start a background listener draining a fresh queue into handlers"""
+    global _LISTENER
+    log_queue = queue.SimpleQueue()
+    _QUEUE_HANDLER.queue = log_queue
+    _LISTENER = logging.handlers.QueueListener(log_queue,
+                                               *handlers,
+                                               respect_handler_level=True)
+    _LISTENER.start()
+
+
+def _restart_listener_after_fork():
+    """The listener thread does not survive fork(), start a new one"""
+    if _LISTENER is not None:
+        _start_listener(_LISTENER.handlers)
+
+
+def stop_logging():
+    """Flush queued records and stop the background listener"""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
 
 def setup_logging():
     """
     Setup logging with daily rotating files
     Creates two files per day: normal logs and error logs
+
+    LOG_MODE=async (default) only enqueues records on the calling thread;
+    a background listener formats them and does the file I/O.
+    LOG_MODE=sync writes from the calling thread.
+    LOG_FORMAT=json writes one JSON object per record.
     """
+    global _QUEUE_HANDLER
+
     # Get log directory from environment or use default
     log_dir = os.getenv('LOG_DIR', '/app/logs')
 
@@ -26,48 +183,57 @@ def setup_logging():
 
     log_path.mkdir(parents=True, exist_ok=True)
 
-    # Get current date for filename
-    today = datetime.now().strftime('%Y-%m-%d')
-
-    # File paths
-    info_log_file = log_path / f"{today}.log"
-    error_log_file = log_path / f"{today}_errors.log"
-
     # Get log level from environment
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    log_mode = os.getenv('LOG_MODE', 'async').lower()
+    json_format = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
 
     # Create formatters
-    detailed_formatter = logging.Formatter(
+    detailed_formatter = StructuredFormatter(
         '[%(asctime)s] %(levelname)s [%(name)s:%(lineno)d] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S')
+        datefmt='%Y-%m-%d %H:%M:%S',
+        json_format=json_format)
 
     # Setup root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level))
 
     # Remove existing handlers
+    stop_logging()
     root_logger.handlers.clear()
 
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(console_handler)
 
     # Info file handler (all logs)
-    info_handler = logging.FileHandler(info_log_file, encoding='utf-8')
+    info_handler = DailyFileHandler(log_path)
     info_handler.setLevel(logging.INFO)
     info_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(info_handler)
 
     # Error file handler (errors only)
-    error_handler = logging.FileHandler(error_log_file, encoding='utf-8')
+    error_handler = DailyFileHandler(log_path, suffix='_errors')
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(error_handler)
+
+    handlers = [console_handler, info_handler, error_handler]
+
+    if log_mode == 'async':
+        _QUEUE_HANDLER = DeferredQueueHandler(queue.SimpleQueue())
+        _QUEUE_HANDLER.addFilter(ContextFieldsFilter())
+        root_logger.addHandler(_QUEUE_HANDLER)
+        _start_listener(handlers)
+    else:
+        for handler in handlers:
+            handler.addFilter(ContextFieldsFilter())
+            root_logger.addHandler(handler)
 
     return root_logger
 
 
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(stop_logging)
+
 # Initialize logger
 logger = setup_logging()
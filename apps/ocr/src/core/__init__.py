@@ -7,6 +7,9 @@ from .ocr_processor import (
     get_ocr_model,
     get_class_model,
     get_id_model,
+    start_model_watcher,
+    process_id_sheet,
+    MODEL_REGISTRY,
     SCRIPT_DIR,
     RUNS_DIR,
     ID_DIGIT_CONFIDENCE
@@ -20,6 +23,9 @@ __all__ = [
     'get_ocr_model',
     'get_class_model',
     'get_id_model',
+    'start_model_watcher',
+    'process_id_sheet',
+    'MODEL_REGISTRY',
     'SCRIPT_DIR',
     'RUNS_DIR',
     'ID_DIGIT_CONFIDENCE'
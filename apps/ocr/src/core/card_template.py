@@ -0,0 +1,218 @@
+"""
+Template geometry for Egyptian ID card fronts
+The front has a fixed layout, so once the card is located it is rectified to
+a canonical size and the text fields are cut from known template regions.
+Checks on the rectified card decide whether the template can be trusted;
+otherwise callers fall back to the per-field detections.
+"""
+import os
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import logger
+
+# Canonical card size (ID-1 format, 85.6 x 53.98 mm at ~300 dpi)
+CARD_SIZE = (1012, 638)
+CARD_ASPECT = CARD_SIZE[0] / CARD_SIZE[1]
+
+# Field regions as (x1, y1, x2, y2) fractions of the rectified card,
+# keyed by class-model class name. Recalibrate with run_calibrate_template.py
+DEFAULT_REGIONS = {
+    'firstname': (0.40, 0.22, 0.98, 0.36),
+    'second name': (0.30, 0.34, 0.98, 0.48),
+    'location': (0.30, 0.46, 0.98, 0.66),
+    'national_id': (0.34, 0.76, 0.98, 0.92),
+}
+# Text fields in crop-slot order (crops/1, crops/2, crops/3)
+TEXT_FIELDS = ('firstname', 'second name', 'location')
+ID_FIELD = 'national_id'
+
+# Card box aspect may deviate this much (relative) from ID-1
+TEMPLATE_ASPECT_TOLERANCE = float(
+    os.getenv('TEMPLATE_ASPECT_TOLERANCE', '0.15'))
+# Minimum grey-level standard deviation of a field region (blank = misaligned)
+TEMPLATE_MIN_CONTRAST = float(os.getenv('TEMPLATE_MIN_CONTRAST', '12'))
+# Detected field centres must lie within the region grown by this fraction
+TEMPLATE_REGION_MARGIN = float(os.getenv('TEMPLATE_REGION_MARGIN', '0.05'))
+
+_TEMPLATE = None
+# True once a template file calibrating every field has been loaded
+_CALIBRATED = False
+
+
+def resolve_template_file() -> Path:
+    """TEMPLATE_FILE, relative paths are resolved against the ocr/ root"""
+    template_file = os.getenv('TEMPLATE_FILE', 'models/id_template.json')
+    if os.path.isabs(template_file):
+        return Path(template_file)
+    ocr_root = Path(__file__).resolve().parent.parent.parent
+    return (ocr_root / template_file).resolve()
+
+
+def get_template() -> Dict[str, Tuple[float, float, float, float]]:
+    """Field regions, from the calibrated template file if there is one"""
+    global _TEMPLATE, _CALIBRATED
+    if _TEMPLATE is None:
+        regions = dict(DEFAULT_REGIONS)
+        template_path = resolve_template_file()
+        if template_path.exists():
+            try:
+                with open(template_path, 'r', encoding='utf-8') as f:
+                    calibrated = json.load(f).get('regions', {})
+                regions.update({
+                    name: tuple(box)
+                    for name, box in calibrated.items() if name in regions
+                })
+                _CALIBRATED = all(name in calibrated
+                                  for name in DEFAULT_REGIONS)
+                logger.info(f"Loaded ID card template from {template_path}")
+            except (OSError, ValueError) as e:
+                logger.warning(
+                    f"Ignoring invalid template {template_path}: {e}")
+        _TEMPLATE = regions
+    return _TEMPLATE
+
+
+def is_calibrated() -> bool:
+    """Whether every field region comes from a calibrated template file"""
+    get_template()
+    return _CALIBRATED
+
+
+def region_pixels(name: str) -> Tuple[int, int, int, int]:
+    """Region of a field in rectified-card pixel coordinates"""
+    x1, y1, x2, y2 = get_template()[name]
+    width, height = CARD_SIZE
+    return (int(x1 * width), int(y1 * height), int(x2 * width),
+            int(y2 * height))
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Order four points as top-left, top-right, bottom-right, bottom-left"""
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)], points[np.argmin(diffs)],
+        points[np.argmax(sums)], points[np.argmax(diffs)]
+    ],
+                    dtype=np.float32)
+
+
+def find_card_corners(image: np.ndarray, box) -> np.ndarray:
+    """
+    Card corners inside a detected card box
+    Looks for the card outline (a large quadrilateral) in a slightly grown
+    box, which corrects small rotations and perspective; falls back to the
+    box corners when no outline is found.
+    """
+    img_h, img_w = image.shape[:2]
+    x1, y1, x2, y2 = box
+    pad_x, pad_y = (x2 - x1) * 0.04, (y2 - y1) * 0.04
+    bx1, by1 = int(max(0, x1 - pad_x)), int(max(0, y1 - pad_y))
+    bx2, by2 = int(min(img_w, x2 + pad_x)), int(min(img_h, y2 + pad_y))
+    box_corners = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]],
+                           dtype=np.float32)
+
+    roi = image[by1:by2, bx1:bx2]
+    if roi.size == 0:
+        return box_corners
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL,
+                                   cv2.CHAIN_APPROX_SIMPLE)
+    box_area = (x2 - x1) * (y2 - y1)
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:3]:
+        if cv2.contourArea(contour) < 0.8 * box_area:
+            break
+        approx = cv2.approxPolyDP(contour,
+                                  0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return _order_corners(approx) + np.array([bx1, by1],
+                                                     dtype=np.float32)
+    return box_corners
+
+
+def rectify_card(image: np.ndarray,
+                 box) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], str]:
+    """
+    Warp the card to CARD_SIZE
+
+    Returns:
+        tuple: (rectified card, homography image->card, rejection reason);
+            card and homography are None when the card shape is implausible
+    """
+    corners = find_card_corners(image, box)
+    top_left, top_right, bottom_right, bottom_left = corners
+    width = (np.linalg.norm(top_right - top_left) +
+             np.linalg.norm(bottom_right - bottom_left)) / 2
+    height = (np.linalg.norm(bottom_left - top_left) +
+              np.linalg.norm(bottom_right - top_right)) / 2
+    if height <= 0:
+        return None, None, 'empty card box'
+    aspect = width / height
+    if abs(aspect - CARD_ASPECT) / CARD_ASPECT > TEMPLATE_ASPECT_TOLERANCE:
+        return None, None, f'card aspect {aspect:.2f}'
+
+    card_w, card_h = CARD_SIZE
+    target = np.array(
+        [[0, 0], [card_w - 1, 0], [card_w - 1, card_h - 1], [0, card_h - 1]],
+        dtype=np.float32)
+    homography = cv2.getPerspectiveTransform(corners, target)
+    card = cv2.warpPerspective(image,
+                               homography,
+                               CARD_SIZE,
+                               flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_REPLICATE)
+    return card, homography, ''
+
+
+def check_template(card: np.ndarray, homography: np.ndarray,
+                   field_boxes: Dict[str, List]) -> str:
+    """
+    Check that the template fits this card
+
+    Args:
+        card: Rectified card
+        homography: Image -> card transform from rectify_card
+        field_boxes: Detected field boxes (image coordinates) by class name
+
+    Returns:
+        str: Reason the template was rejected, '' if it fits
+    """
+    gray = cv2.cvtColor(card, cv2.COLOR_BGR2GRAY)
+    for name in TEXT_FIELDS + (ID_FIELD, ):
+        x1, y1, x2, y2 = region_pixels(name)
+        contrast = float(gray[y1:y2, x1:x2].std())
+        if contrast < TEMPLATE_MIN_CONTRAST:
+            return f'{name} region blank (contrast {contrast:.1f})'
+
+    # Fields the detector did find must agree with the template
+    card_w, card_h = CARD_SIZE
+    for name, box in field_boxes.items():
+        if name not in get_template():
+            continue
+        center = np.array([[[(box[0] + box[2]) / 2, (box[1] + box[3]) / 2]]],
+                          dtype=np.float32)
+        cx, cy = cv2.perspectiveTransform(center, homography)[0, 0]
+        rx1, ry1, rx2, ry2 = get_template()[name]
+        if not (rx1 - TEMPLATE_REGION_MARGIN <= cx / card_w <=
+                rx2 + TEMPLATE_REGION_MARGIN and
+                ry1 - TEMPLATE_REGION_MARGIN <= cy / card_h <=
+                ry2 + TEMPLATE_REGION_MARGIN):
+            return f'{name} detected outside its template region'
+    return ''
+
+
+def cut_fields(card: np.ndarray) -> Dict[str, np.ndarray]:
+    """Crop every template field from a rectified card"""
+    crops = {}
+    for name in get_template():
+        x1, y1, x2, y2 = region_pixels(name)
+        crops[name] = card[y1:y2, x1:x2]
+    return crops
@@ -0,0 +1,180 @@
+"""
+Best-frame selection for burst uploads
+Webcams and phones send several candidate frames of the same card. Frames
+are ranked with cheap image statistics (sharpness, glare) on a downscaled
+copy, and only the top few go through the class model to confirm the
+"egyptian-id" card. The full pipeline then runs on the winning frame only.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import logger
+from .ocr_processor import get_class_model
+
+# Frames accepted per request (extra frames are ignored)
+BURST_MAX_FRAMES = int(os.getenv('BURST_MAX_FRAMES', '8'))
+# Frames (best by sharpness and glare) checked with the class model
+BURST_DETECT_TOP_K = int(os.getenv('BURST_DETECT_TOP_K', '3'))
+# Longest side of the copy used for sharpness and glare scoring
+BURST_SCORE_SIZE = int(os.getenv('BURST_SCORE_SIZE', '640'))
+# Grey level at or above which a pixel counts as glare
+BURST_GLARE_LEVEL = int(os.getenv('BURST_GLARE_LEVEL', '250'))
+# Lowest class-model confidence that still counts as a card
+BURST_MIN_CARD_CONFIDENCE = float(
+    os.getenv('BURST_MIN_CARD_CONFIDENCE', '0.1'))
+
+
+def downscale(image: np.ndarray, size: int = BURST_SCORE_SIZE) -> np.ndarray:
+    """Shrink image so its longest side is at most size"""
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Variance of the Laplacian (higher is sharper)"""
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def glare_fraction(gray: np.ndarray) -> float:
+    """Fraction of saturated pixels"""
+    if gray.size == 0:
+        return 0.0
+    return float(np.count_nonzero(gray >= BURST_GLARE_LEVEL)) / gray.size
+
+
+def detect_card(image: np.ndarray) -> Tuple[float, Optional[List[float]]]:
+    """
+    Most confident "egyptian-id" detection of the class model
+
+    Returns:
+        tuple: (confidence, box), (0.0, None) if no card was found
+    """
+    model = get_class_model()
+    cards = [
+        det for det in model.predict(image, conf=BURST_MIN_CARD_CONFIDENCE)
+        if model.names.get(det['class']) == 'egyptian-id'
+    ]
+    if not cards:
+        return 0.0, None
+    best = max(cards, key=lambda det: det['confidence'])
+    return float(best['confidence']), [float(v) for v in best['box']]
+
+
+def score_frames(images: List[np.ndarray],
+                 top_k: int = BURST_DETECT_TOP_K) -> List[Dict]:
+    """
+    Score candidate frames of one card
+
+    Every frame gets a quality from its sharpness (relative to the sharpest
+    frame of the burst) and glare. The top_k frames by quality are run
+    through the class model; their score is the card confidence times the
+    relative sharpness, discounted by the glare on the card itself.
+
+    Args:
+        images: Candidate frames (BGR)
+        top_k: Frames checked with the class model
+
+    Returns:
+        list: One dict per frame (index, sharpness, glare, quality,
+              cardConfidence, score); unchecked frames have no
+              cardConfidence and a score of 0
+    """
+    scores = []
+    grays = []
+    for index, image in enumerate(images):
+        small = downscale(image)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        grays.append((small, gray))
+        scores.append({
+            'index': index,
+            'sharpness': sharpness(gray),
+            'glare': glare_fraction(gray)
+        })
+
+    max_sharpness = max((s['sharpness'] for s in scores), default=0.0)
+    relative = [
+        s['sharpness'] / max_sharpness if max_sharpness else 0.0
+        for s in scores
+    ]
+    for s in scores:
+        s['quality'] = relative[s['index']] * (1.0 - s['glare'])
+        s['score'] = 0.0
+
+    for s in sorted(scores, key=lambda s: s['quality'],
+                    reverse=True)[:max(1, top_k)]:
+        small, gray = grays[s['index']]
+        confidence, box = detect_card(small)
+        s['cardConfidence'] = confidence
+        if box is None:
+            continue
+        x1, y1, x2, y2 = map(int, box)
+        card_glare = glare_fraction(gray[y1:y2, x1:x2])
+        s['score'] = confidence * relative[s['index']] * (1.0 - card_glare)
+
+    for s in scores:
+        for key in ('sharpness', 'glare', 'quality', 'score'):
+            s[key] = round(s[key], 4)
+    return scores
+
+
+def select_best_frame(images: List[np.ndarray]) -> Tuple[int, List[Dict]]:
+    """
+    Pick the frame the full pipeline should run on
+
+    Falls back to the best quality frame if no card was found in any of the
+    checked frames (the pipeline then reports the invalid photo).
+
+    Returns:
+        tuple: (index of the best frame, per-frame scores)
+    """
+    if not images:
+        raise ValueError("No frames to select from")
+    if len(images) == 1:
+        return 0, [{'index': 0}]
+
+    scores = score_frames(images)
+    best = max(scores, key=lambda s: (s['score'], s['quality']))
+    return best['index'], scores
+
+
+def select_best_encoded(frames: List[bytes],
+                        request_id: str = 'default') -> int:
+    """
+    select_best_frame over encoded (JPEG/PNG) frames
+    Frames that fail to decode are skipped.
+
+    Returns:
+        int: Index of the best frame in frames
+    """
+    decoded = []
+    for index, data in enumerate(frames[:BURST_MAX_FRAMES]):
+        # imdecode raises on an empty buffer instead of returning None
+        image = cv2.imdecode(np.frombuffer(data, np.uint8),
+                             cv2.IMREAD_COLOR) if data else None
+        if image is None:
+            logger.warning("[%s] Skipping undecodable frame %d", request_id,
+                           index)
+            continue
+        decoded.append((index, image))
+    if not decoded:
+        raise ValueError("No decodable frames")
+    best, scores = select_best_frame([image for _, image in decoded])
+    # Report frames by their position in the request
+    for s in scores:
+        s['index'] = decoded[s['index']][0]
+    frame_index = decoded[best][0]
+    logger.info("[%s] Selected frame %d of %d",
+                request_id,
+                frame_index,
+                len(frames),
+                extra={'fields': {
+                    'frames': scores
+                }})
+    return frame_index
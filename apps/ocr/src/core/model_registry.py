@@ -0,0 +1,296 @@
+"""
+Versioned model registry for Egyptian ID OCR service
+Loads each model once under concurrency, tracks its version and can load and
+warm a new version in the background, then switch over atomically.
+Models idle for longer than a timeout can be unloaded; they are loaded again
+on next use. Models inherited across fork() are never unloaded as idle.
+"""
+import gc
+import os
+import time
+import ctypes
+import threading
+import weakref
+import yaml
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+from ..config import logger
+
+
+class ModelHandle:
+    """A loaded model together with the version it was loaded from"""
+
+    def __init__(self, name: str, version: str, model: Any):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+
+
+class ModelSpec:
+    """How to load, version and warm up one registered model"""
+
+    def __init__(self,
+                 loader: Callable[[], Any],
+                 version: Callable[[], str],
+                 warmup: Optional[Callable[[Any], None]] = None,
+                 on_reload: Optional[Callable[[], None]] = None,
+                 on_unload: Optional[Callable[[], None]] = None):
+        self.loader = loader
+        self.version = version
+        self.warmup = warmup
+        # Called before loading a new version (e.g. drop cached IR)
+        self.on_reload = on_reload
+        # Called after an idle model is unloaded (e.g. drop cached IR)
+        self.on_unload = on_unload
+
+
+class ModelRegistry:
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._specs: Dict[str, ModelSpec] = {}
+        self._handles: Dict[str, ModelHandle] = {}
+        # One lock per model so a slow load does not block the others
+        self._locks: Dict[str, threading.Lock] = {}
+        self._watcher = None
+        self._stop_watcher = threading.Event()
+        self._idle_monitor = None
+        # Monotonic time of the last get() per model
+        self._last_used: Dict[str, float] = {}
+        self._unloaded_at: Dict[str, str] = {}
+        self._unload_counts: Dict[str, int] = {}
+        # Models loaded by the parent before fork(): their pages are shared
+        # copy-on-write and stay resident in the parent, so unloading them
+        # frees nothing and reloading adds a private copy
+        self._inherited: Set[str] = set()
+        self.idle_timeout = 0.0
+
+    def register(self, name: str, spec: ModelSpec):
+        """Register how to load a model (does not load it)"""
+        self._specs[name] = spec
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Return the current model, loading it on first use
+        Callers keep the returned reference for the whole operation, so a
+        swap never changes the model under an in-flight request.
+        """
+        self._last_used[name] = time.monotonic()
+        handle = self._handles.get(name)
+        if handle is None:
+            with self._locks[name]:
+                handle = self._handles.get(name)
+                if handle is None:
+                    handle = self._load(name)
+                    self._handles[name] = handle
+                    self._unloaded_at.pop(name, None)
+        return handle.model
+
+    def mark_inherited(self):
+        """Record the loaded models as inherited (call in a forked child)"""
+        self._inherited = set(self._handles)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._handles
+
+    def version(self, name: str) -> Optional[str]:
+        handle = self._handles.get(name)
+        return handle.version if handle else None
+
+    def _load(self, name: str) -> ModelHandle:
+        spec = self._specs[name]
+        version = spec.version()
+        start = time.perf_counter()
+        model = spec.loader()
+        logger.info(f"Loaded model '{name}' version {version} "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return ModelHandle(name, version, model)
+
+    def reload(self, name: str, warmup: bool = True) -> bool:
+        """
+        Load and warm a new version, then swap it in atomically
+        In-flight requests keep using the old model until they finish;
+        it is released once the last reference is dropped.
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        spec = self._specs[name]
+        with self._locks[name]:
+            old = self._handles.get(name)
+            if spec.on_reload:
+                spec.on_reload()
+            try:
+                handle = self._load(name)
+                if warmup and spec.warmup:
+                    spec.warmup(handle.model)
+            except Exception as e:
+                logger.error(
+                    f"Failed to load new version of '{name}', "
+                    f"keeping {old.version if old else 'nothing'}: {e}",
+                    exc_info=True)
+                return False
+
+            self._handles[name] = handle
+            # The new version is private to this process
+            self._inherited.discard(name)
+
+        if old is not None:
+            old_version = old.version
+            weakref.finalize(
+                old.model, logger.info,
+                f"Released model '{name}' version {old_version}")
+            logger.info(f"✓ Swapped model '{name}': {old_version} -> "
+                        f"{handle.version}")
+        return True
+
+    def unload(self, name: str) -> bool:
+        """
+        Drop a loaded model; the next get() loads it again
+        In-flight requests keep their reference until they finish.
+
+        Returns:
+            bool: True if the model was loaded
+        """
+        spec = self._specs[name]
+        with self._locks[name]:
+            handle = self._handles.pop(name, None)
+            if handle is None:
+                return False
+            self._unloaded_at[name] = datetime.now().isoformat(
+                timespec='seconds')
+            self._unload_counts[name] = self._unload_counts.get(name, 0) + 1
+            if spec.on_unload:
+                spec.on_unload()
+        logger.info(f"Unloaded idle model '{name}' version {handle.version}")
+        return True
+
+    def unload_idle(self, idle_timeout: float) -> int:
+        """
+        Unload every model unused for idle_timeout seconds and return freed
+        memory to the OS (inherited models stay loaded)
+
+        Returns:
+            int: Number of models unloaded
+        """
+        now = time.monotonic()
+        unloaded = 0
+        for name in list(self._handles):
+            if name in self._inherited:
+                continue
+            if now - self._last_used.get(name, now) >= idle_timeout:
+                unloaded += self.unload(name)
+        if unloaded:
+            release_memory()
+        return unloaded
+
+    def start_idle_monitor(self, idle_timeout: float):
+        """Unload models idle for idle_timeout seconds (0 disables)"""
+        if idle_timeout <= 0 or self._idle_monitor is not None:
+            return
+        self.idle_timeout = idle_timeout
+        # Preloaded models count as used at startup
+        now = time.monotonic()
+        for name in self._handles:
+            self._last_used.setdefault(name, now)
+        interval = min(60.0, max(1.0, idle_timeout / 4))
+
+        def monitor():
+            while not self._stop_watcher.wait(interval):
+                self.unload_idle(idle_timeout)
+
+        self._idle_monitor = threading.Thread(target=monitor,
+                                              name='model-idle-monitor',
+                                              daemon=True)
+        self._idle_monitor.start()
+        logger.info(f"Unloading models idle for {idle_timeout:.0f} s")
+
+    def check_for_updates(self):
+        """Reload every loaded model whose version on disk has changed"""
+        for name, spec in self._specs.items():
+            handle = self._handles.get(name)
+            if handle is None:
+                continue
+            try:
+                version = spec.version()
+            except Exception as e:
+                logger.warning(f"Failed to read version of '{name}': {e}")
+                continue
+            if version != handle.version:
+                logger.info(f"New version of '{name}' detected: "
+                            f"{handle.version} -> {version}")
+                self.reload(name)
+
+    def start_watcher(self, interval: float):
+        """Poll model versions in a background thread (interval seconds)"""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop_watcher.wait(interval):
+                self.check_for_updates()
+
+        self._watcher = threading.Thread(target=watch,
+                                         name='model-watcher',
+                                         daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching model versions every {interval:.0f} s")
+
+    def stop_watcher(self):
+        self._stop_watcher.set()
+
+    def status(self) -> Dict[str, Dict]:
+        """Loaded versions and idle state, for the health check"""
+        now = time.monotonic()
+        status = {}
+        for name in self._specs:
+            handle = self._handles.get(name)
+            if handle is not None:
+                entry = {
+                    'state': 'loaded',
+                    'version': handle.version,
+                    'loadedAt': handle.loaded_at
+                }
+            elif name in self._unloaded_at:
+                entry = {
+                    'state': 'unloaded',
+                    'unloadedAt': self._unloaded_at[name]
+                }
+            else:
+                # Never used by this process (e.g. another pipeline stage)
+                continue
+            if name in self._last_used:
+                entry['idleSeconds'] = round(now - self._last_used[name])
+            if self._unload_counts.get(name):
+                entry['unloads'] = self._unload_counts[name]
+            if name in self._inherited:
+                entry['inherited'] = True
+            status[name] = entry
+        return status
+
+
+def release_memory():
+    """Collect garbage and return freed heap pages to the OS (glibc)"""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def metadata_version(metadata_path: str) -> Callable[[], str]:
+    """
+    Version reader for an exported OpenVINO model directory
+    Uses the export version/date from metadata.yaml, so replacing the
+    weights and then metadata.yaml triggers a hot swap
+    """
+
+    def read_version() -> str:
+        with open(metadata_path, 'r') as f:
+            metadata = yaml.safe_load(f) or {}
+        exported_at = metadata.get('date') or os.path.getmtime(metadata_path)
+        return f"{metadata.get('version', 'unknown')}@{exported_at}"
+
+    return read_version
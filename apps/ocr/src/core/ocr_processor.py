@@ -1,13 +1,20 @@
 import shutil
+import time
+import queue
+import threading
 import cv2
 import os
 import numpy as np
 import yaml
-from paddleocr import PaddleOCR
-from openvino import Core
-from ..config import logger
+from importlib import metadata as package_metadata
+from .model_registry import ModelRegistry, ModelSpec, metadata_version
+from . import card_template
+from .profiling import (start_request_profile, finish_request_profile,
+                        record_openvino_counters, PROFILE_OV_COUNTERS)
+from ..config import (logger, get_openvino_config, get_ocr_config,
+                      get_precision_mode, CLASS_MODEL_KEY, ID_MODEL_KEY)
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 
 # Load environment variables
 load_dotenv()
@@ -32,25 +39,114 @@ ID_MODEL_METADATA = os.path.join(MODELS_DIR, 'ID_openvino_model',
 CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.6'))
 ID_DIGIT_CONFIDENCE = float(os.getenv('ID_DIGIT_CONFIDENCE', '0.25'))
 IMAGE_SIZE = int(os.getenv('IMAGE_SIZE', '640'))
+# Cut fields from template geometry when the card is found confidently:
+# auto (default) only with a calibrated TEMPLATE_FILE, true also with the
+# uncalibrated default regions, false never
+TEMPLATE_FAST_PATH = os.getenv('TEMPLATE_FAST_PATH', 'auto').lower()
+TEMPLATE_MIN_CONFIDENCE = float(os.getenv('TEMPLATE_MIN_CONFIDENCE', '0.85'))
+
+# Startup configuration
+# Persistent OpenVINO compiled-model cache (set to empty string to disable)
+OV_CACHE_DIR = os.getenv('OV_CACHE_DIR',
+                         os.path.join(SCRIPT_DIR, 'cache', 'openvino'))
+# Synthetic inferences per model before the service declares readiness
+WARMUP_ITERATIONS = int(os.getenv('WARMUP_ITERATIONS', '1'))
+# Infer requests (and preallocated input buffers) per OpenVINO model
+# 0 uses the plugin's OPTIMAL_NUMBER_OF_INFER_REQUESTS for the config
+OV_INFER_REQUESTS = int(os.getenv('OV_INFER_REQUESTS', '0'))
+# Seconds between checks of metadata.yaml for new model versions (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '60'))
+# Unload models unused for this many seconds, reload on next request
+# (0 keeps them resident). Pre-forked workers never unload models inherited
+# from the supervisor (e.g. PaddleOCR with OCR_WORKERS>1)
+MODEL_IDLE_TIMEOUT = float(os.getenv('MODEL_IDLE_TIMEOUT', '0'))
+
+# Text fields in crop-slot order (crops/1, crops/2, crops/3)
+TEXT_FIELD_KEYS = ('first_name', 'second_name', 'location')
+
+# Registry names
+CLASS_MODEL_NAME = 'class'
+ID_MODEL_NAME = 'id'
+OCR_MODEL_NAME = 'ocr'
 
 # ===== MODEL INITIALIZATION =====
-# Global models - loaded once and reused (singleton pattern)
-_CLASS_MODEL = None
-_CLASS_MODEL_METADATA = None
-_ID_MODEL = None
-_ID_MODEL_METADATA = None
-_OCR_MODEL = None
+# Models are loaded once and reused through the registry (see below)
 _OV_CORE = None
+# OpenVINO IR read before forking workers (model path -> ov.Model), so the
+# weights are shared copy-on-write and each worker only compiles
+_OV_MODEL_IR = {}
+# IR paths inherited from the parent at fork(); kept when a model is unloaded
+_INHERITED_IR = set()
+# PaddleOCR predictors are not safe to run concurrently; the OpenVINO models
+# are (one infer request per caller), so only OCR calls are serialized
+_OCR_LOCK = threading.Lock()
 
 
 def get_openvino_core():
     """Get or create OpenVINO Core instance (singleton)"""
     global _OV_CORE
     if _OV_CORE is None:
+        # Heavy import deferred until a model is actually needed
+        from openvino import Core
+
         _OV_CORE = Core()
+        if OV_CACHE_DIR:
+            os.makedirs(OV_CACHE_DIR, exist_ok=True)
+            _OV_CORE.set_property({'CACHE_DIR': OV_CACHE_DIR})
+            logger.info(f"OpenVINO model cache enabled: {OV_CACHE_DIR}")
     return _OV_CORE
 
 
+def int8_model_path(model_xml: str) -> str:
+    """Path of the post-training quantized IR produced by run_quantize.py"""
+    stem, ext = os.path.splitext(model_xml)
+    return f"{stem}_int8{ext}"
+
+
+def resolve_model_xml(model_xml: str, model_key: str) -> str:
+    """IR to load for a model's precision mode (<MODEL_KEY>_PRECISION)"""
+    if get_precision_mode(model_key) != 'int8':
+        return model_xml
+    quantized_xml = int8_model_path(model_xml)
+    if not os.path.exists(quantized_xml):
+        logger.error(f"{model_key}_PRECISION=int8 but {quantized_xml} does "
+                     "not exist (run run_quantize.py), using FP32 model")
+        return model_xml
+    return quantized_xml
+
+
+def forget_openvino_model(model_xml: str):
+    """Drop cached IRs (all precision variants) so a reload reads from disk"""
+    for path in (model_xml, int8_model_path(model_xml)):
+        _OV_MODEL_IR.pop(path, None)
+        # The IR read next is private to this process
+        _INHERITED_IR.discard(path)
+
+
+def release_openvino_model(model_xml: str):
+    """
+    Drop the cached IRs of an unloaded model, except those inherited from
+    the pre-fork supervisor (their pages stay resident there, reading the IR
+    again would only add a private copy)
+    """
+    for path in (model_xml, int8_model_path(model_xml)):
+        if path not in _INHERITED_IR:
+            _OV_MODEL_IR.pop(path, None)
+
+
+def _after_fork_in_child():
+    # Everything loaded so far is shared copy-on-write with the parent
+    _INHERITED_IR.update(_OV_MODEL_IR)
+    MODEL_REGISTRY.mark_inherited()
+
+
+def read_openvino_model(model_path: str):
+    """Read an OpenVINO IR once and keep it for later compilation"""
+    if model_path not in _OV_MODEL_IR:
+        _OV_MODEL_IR[model_path] = get_openvino_core().read_model(model_path)
+    return _OV_MODEL_IR[model_path]
+
+
 def load_metadata(metadata_path: str) -> Dict:
     """Load model metadata from YAML file"""
     with open(metadata_path, 'r') as f:
@@ -116,6 +212,46 @@ def preprocess_image(
     return img_input, ratio, (dw, dh)
 
 
+def preprocess_into(
+        image: np.ndarray, canvas: np.ndarray,
+        input_buffer: np.ndarray) -> Tuple[float, Tuple[float, float]]:
+    """
+    Same preprocessing as preprocess_image, but writing into preallocated
+    buffers instead of allocating new arrays on every call
+
+    Args:
+        image: BGR image
+        canvas: uint8 (H, W, 3) letterbox buffer
+        input_buffer: float32 (1, 3, H, W) model input buffer
+
+    Returns: (scale_ratio, padding)
+    """
+    shape = image.shape[:2]
+    new_shape = canvas.shape[:2]
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw = (new_shape[1] - new_unpad[0]) / 2
+    dh = (new_shape[0] - new_unpad[1]) / 2
+    top = int(round(dh - 0.1))
+    left = int(round(dw - 0.1))
+
+    if shape[::-1] != new_unpad:
+        image = cv2.resize(image, new_unpad, interpolation=cv2.INTER_LINEAR)
+
+    canvas.fill(114)
+    canvas[top:top + new_unpad[1], left:left + new_unpad[0]] = image
+
+    # BGR HWC uint8 -> RGB CHW float32 in [0, 1], one channel at a time
+    for channel in range(3):
+        np.multiply(canvas[:, :, 2 - channel],
+                    1.0 / 255.0,
+                    out=input_buffer[0, channel],
+                    casting='unsafe')
+
+    return r, (dw, dh)
+
+
 def xywh2xyxy(x: np.ndarray) -> np.ndarray:
     """Convert bounding box from [x_center, y_center, width, height] to [x1, y1, x2, y2]"""
     y = np.copy(x)
@@ -177,7 +313,7 @@ def postprocess_yolo_output(output: np.ndarray,
     if output.shape[0] < output.shape[1]:
         output = output.T  # Transpose to [num_detections, 4+num_classes]
 
-    logger.debug(f"Postprocess output shape after transpose: {output.shape}")
+    logger.debug("Postprocess output shape after transpose: %s", output.shape)
 
     # Extract boxes and scores
     # YOLO output format: [x_center, y_center, width, height, class_scores...]
@@ -194,7 +330,7 @@ def postprocess_yolo_output(output: np.ndarray,
     scores = max_scores[mask]
     classes = max_classes[mask]
 
-    logger.debug(f"Detections after confidence filter: {len(boxes)}")
+    logger.debug("Detections after confidence filter: %d", len(boxes))
 
     if len(boxes) == 0:
         return detections
@@ -224,13 +360,40 @@ def postprocess_yolo_output(output: np.ndarray,
     return detections
 
 
+class InferSlot:
+    """An infer request bound to its own preallocated input buffers"""
+
+    def __init__(self, compiled_model, imgsz: Tuple[int, int]):
+        from openvino import Tensor
+
+        self.request = compiled_model.create_infer_request()
+        self.canvas = np.empty((imgsz[0], imgsz[1], 3), dtype=np.uint8)
+        self.input = np.empty((1, 3, imgsz[0], imgsz[1]), dtype=np.float32)
+        # Shared-memory tensor: OpenVINO reads self.input without a copy
+        self.request.set_input_tensor(Tensor(self.input, shared_memory=True))
+
+
 class OpenVINOYOLOModel:
     """Wrapper for OpenVINO YOLO model"""
 
-    def __init__(self, model_path: str, metadata_path: str):
+    def __init__(self,
+                 model_path: str,
+                 metadata_path: str,
+                 config: Dict[str, str] = None):
         self.core = get_openvino_core()
-        self.model = self.core.read_model(model_path)
-        self.compiled_model = self.core.compile_model(self.model, "CPU")
+        self.config = config or {}
+        self.name = os.path.basename(model_path)
+        if PROFILE_OV_COUNTERS:
+            # Per-layer counters for the sampled profiler
+            self.config = {**self.config, 'PERF_COUNT': 'YES'}
+        # Compiling straight from the XML path lets OpenVINO import the
+        # cached blob from CACHE_DIR without reading and rebuilding the graph.
+        # Workers forked by the supervisor compile the IR read before fork.
+        start = time.perf_counter()
+        source = _OV_MODEL_IR.get(model_path, model_path)
+        self.compiled_model = self.core.compile_model(source, "CPU",
+                                                      self.config)
+        compile_ms = (time.perf_counter() - start) * 1000
         self.output_layer = self.compiled_model.output(0)
         self.input_layer = self.compiled_model.input(0)
 
@@ -240,11 +403,25 @@ class OpenVINOYOLOModel:
         self.imgsz = tuple(self.metadata.get('imgsz', [640, 640]))
         self.stride = self.metadata.get('stride', 32)
 
-        logger.info(f"Loaded OpenVINO model: {os.path.basename(model_path)}")
+        logger.info(
+            f"Loaded OpenVINO model: {os.path.basename(model_path)} ({compile_ms:.0f} ms)"
+        )
         logger.info(
             f"Input shape: {self.input_layer.shape}, Output shape: {self.output_layer.shape}"
         )
         logger.info(f"Classes: {self.names}")
+        if self.config:
+            logger.info(f"OpenVINO config: {self.config}")
+
+        # One preallocated slot per infer request; predict() borrows a slot
+        # so concurrent calls never share buffers
+        slot_count = OV_INFER_REQUESTS or self.compiled_model.get_property(
+            'OPTIMAL_NUMBER_OF_INFER_REQUESTS')
+        self.slot_count = max(1, int(slot_count))
+        self._slots = queue.Queue()
+        for _ in range(self.slot_count):
+            self._slots.put(InferSlot(self.compiled_model, self.imgsz))
+        logger.info(f"Infer requests: {self.slot_count}")
 
     def predict(self,
                 image: np.ndarray,
@@ -253,16 +430,22 @@ class OpenVINOYOLOModel:
         """Run inference on image"""
         original_shape = image.shape[:2]
 
-        # Preprocess
-        input_tensor, ratio, (dw, dh) = preprocess_image(image, self.imgsz)
+        slot = self._slots.get()
+        try:
+            # Preprocess in place into the slot's bound input buffer
+            ratio, (dw, dh) = preprocess_into(image, slot.canvas, slot.input)
 
-        # Inference
-        result = self.compiled_model([input_tensor])[self.output_layer]
-        logger.debug(f"Raw model output shape: {result.shape}")
+            # Inference
+            slot.request.infer()
+            record_openvino_counters(self.name, slot.request)
+            result = slot.request.get_output_tensor(0).data
+            logger.debug("Raw model output shape: %s", result.shape)
 
-        # Postprocess
-        detections = postprocess_yolo_output(result, conf, iou)
-        logger.debug(f"Number of detections: {len(detections)}")
+            # Postprocess (before the slot, and its output, is reused)
+            detections = postprocess_yolo_output(result, conf, iou)
+            logger.debug("Number of detections: %d", len(detections))
+        finally:
+            self._slots.put(slot)
 
         # Scale boxes back to original image
         h, w = original_shape
@@ -282,70 +465,204 @@ class OpenVINOYOLOModel:
 
         return detections
 
+    def warmup(self, iterations: int = 1):
+        """Run synthetic inferences to pay one-time allocation costs upfront"""
+        dummy = np.full((self.imgsz[0], self.imgsz[1], 3), 114, dtype=np.uint8)
+        # Slots are handed out round-robin, so this warms every slot
+        for _ in range(iterations * self.slot_count):
+            self.predict(dummy)
+
+
+def _load_class_model():
+    logger.info("Loading Egyptian ID classification model (OpenVINO)...")
+    return OpenVINOYOLOModel(resolve_model_xml(CLASS_MODEL_XML,
+                                               CLASS_MODEL_KEY),
+                             CLASS_MODEL_METADATA,
+                             get_openvino_config(CLASS_MODEL_KEY))
+
+
+def _load_id_model():
+    logger.info("Loading ID digit detection model (OpenVINO)...")
+    return OpenVINOYOLOModel(resolve_model_xml(ID_MODEL_XML, ID_MODEL_KEY),
+                             ID_MODEL_METADATA,
+                             get_openvino_config(ID_MODEL_KEY))
+
+
+def _model_version(metadata_path: str, model_key: str):
+    """metadata.yaml version plus the precision mode it runs in"""
+    read_version = metadata_version(metadata_path)
+    return lambda: (f"{read_version()}/"
+                    f"{get_precision_mode(model_key) or 'default'}")
+
+
+def _load_ocr_model():
+    logger.info("Loading PaddleOCR model...")
+    # Heavy import (paddle) deferred until OCR is actually needed
+    from paddleocr import PaddleOCR
+
+    ocr_config = get_ocr_config()
+    if ocr_config:
+        logger.info(f"PaddleOCR config: {ocr_config}")
+    return PaddleOCR(lang='ar',
+                     use_doc_orientation_classify=False,
+                     use_doc_unwarping=False,
+                     use_textline_orientation=False,
+                     **ocr_config)
+
+
+MODEL_REGISTRY = ModelRegistry()
+MODEL_REGISTRY.register(
+    CLASS_MODEL_NAME,
+    ModelSpec(_load_class_model,
+              _model_version(CLASS_MODEL_METADATA, CLASS_MODEL_KEY),
+              warmup=lambda model: model.warmup(WARMUP_ITERATIONS),
+              on_reload=lambda: forget_openvino_model(CLASS_MODEL_XML),
+              on_unload=lambda: release_openvino_model(CLASS_MODEL_XML)))
+MODEL_REGISTRY.register(
+    ID_MODEL_NAME,
+    ModelSpec(_load_id_model,
+              _model_version(ID_MODEL_METADATA, ID_MODEL_KEY),
+              warmup=lambda model: model.warmup(WARMUP_ITERATIONS),
+              on_reload=lambda: forget_openvino_model(ID_MODEL_XML),
+              on_unload=lambda: release_openvino_model(ID_MODEL_XML)))
+MODEL_REGISTRY.register(
+    OCR_MODEL_NAME,
+    ModelSpec(_load_ocr_model,
+              lambda: f"paddleocr-{package_metadata.version('paddleocr')}",
+              warmup=lambda ocr: warmup_ocr_model(ocr, WARMUP_ITERATIONS)))
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
 
 def get_class_model():
-    """Lazy load classification model (singleton pattern)"""
-    global _CLASS_MODEL
-    if _CLASS_MODEL is None:
-        logger.info("Loading Egyptian ID classification model (OpenVINO)...")
-        _CLASS_MODEL = OpenVINOYOLOModel(CLASS_MODEL_XML, CLASS_MODEL_METADATA)
-        logger.info("Classification model loaded")
-    return _CLASS_MODEL
+    """Classification model, loaded on first use (thread-safe)"""
+    return MODEL_REGISTRY.get(CLASS_MODEL_NAME)
 
 
 def get_id_model():
-    """Lazy load ID digit detection model (singleton pattern)"""
-    global _ID_MODEL
-    if _ID_MODEL is None:
-        logger.info("Loading ID digit detection model (OpenVINO)...")
-        _ID_MODEL = OpenVINOYOLOModel(ID_MODEL_XML, ID_MODEL_METADATA)
-        logger.info("ID digit model loaded")
-    return _ID_MODEL
+    """ID digit detection model, loaded on first use (thread-safe)"""
+    return MODEL_REGISTRY.get(ID_MODEL_NAME)
 
 
 def get_ocr_model():
-    """Lazy load PaddleOCR model (singleton pattern)"""
-    global _OCR_MODEL
-    if _OCR_MODEL is None:
-        logger.info("Loading PaddleOCR model...")
-        _OCR_MODEL = PaddleOCR(lang='ar',
-                               use_doc_orientation_classify=False,
-                               use_doc_unwarping=False,
-                               use_textline_orientation=False)
-        logger.info("PaddleOCR model loaded")
-    return _OCR_MODEL
-
-
-def preload_models():
-    """Preload all models at startup"""
-    logger.info("Preloading all models...")
-    get_ocr_model()
-    get_class_model()
-    get_id_model()
-    logger.info("All models preloaded successfully")
+    """PaddleOCR model, loaded on first use (thread-safe)"""
+    return MODEL_REGISTRY.get(OCR_MODEL_NAME)
+
+
+def start_model_watcher():
+    """
+    Hot-swap models when their metadata.yaml version changes and unload
+    models idle for MODEL_IDLE_TIMEOUT seconds
+    """
+    MODEL_REGISTRY.start_watcher(MODEL_WATCH_INTERVAL)
+    MODEL_REGISTRY.start_idle_monitor(MODEL_IDLE_TIMEOUT)
+
+
+def warmup_ocr_model(ocr, iterations: int = 1):
+    """Run PaddleOCR on a synthetic text line to initialize its predictors"""
+    dummy = np.full((48, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(dummy, 'warmup 0123', (10, 34), cv2.FONT_HERSHEY_SIMPLEX, 1.0,
+                (0, 0, 0), 2)
+    for _ in range(iterations):
+        ocr.predict(dummy)
+
+
+def preload_models(warmup: bool = True,
+                   compile_openvino: bool = True,
+                   models: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    Preload all models at startup
+
+    Args:
+        warmup: Run WARMUP_ITERATIONS synthetic inferences through every model
+        compile_openvino: Compile the OpenVINO models. When False (supervisor
+            before fork) the IR is only read: compiled models own inference
+            thread pools that do not survive fork().
+        models: Registry names to load (default: all), e.g. only the models
+            a pipeline stage needs
+
+    Returns:
+        dict: Duration of each startup phase in milliseconds
+    """
+    models = set(models or (OCR_MODEL_NAME, CLASS_MODEL_NAME, ID_MODEL_NAME))
+    logger.info(f"Preloading models: {', '.join(sorted(models))}...")
+    timings = {}
+
+    def timed(phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        timings[phase] = (time.perf_counter() - start) * 1000
+        return result
+
+    ocr = (timed('load_ocr', get_ocr_model)
+           if OCR_MODEL_NAME in models else None)
+    if not compile_openvino:
+        if CLASS_MODEL_NAME in models:
+            timed(
+                'read_class_model', lambda: read_openvino_model(
+                    resolve_model_xml(CLASS_MODEL_XML, CLASS_MODEL_KEY)))
+        if ID_MODEL_NAME in models:
+            timed(
+                'read_id_model', lambda: read_openvino_model(
+                    resolve_model_xml(ID_MODEL_XML, ID_MODEL_KEY)))
+        for phase, duration in timings.items():
+            logger.info(f"Startup phase {phase}: {duration:.0f} ms")
+        logger.info("Models read, OpenVINO compilation deferred to workers")
+        return timings
+
+    class_model = (timed('load_class_model', get_class_model)
+                   if CLASS_MODEL_NAME in models else None)
+    id_model = (timed('load_id_model', get_id_model)
+                if ID_MODEL_NAME in models else None)
+
+    if warmup and WARMUP_ITERATIONS > 0:
+        logger.info(f"Warming up models ({WARMUP_ITERATIONS} iteration(s))...")
+        if ocr is not None:
+            timed('warmup_ocr',
+                  lambda: warmup_ocr_model(ocr, WARMUP_ITERATIONS))
+        if class_model is not None:
+            timed('warmup_class_model',
+                  lambda: class_model.warmup(WARMUP_ITERATIONS))
+        if id_model is not None:
+            timed('warmup_id_model',
+                  lambda: id_model.warmup(WARMUP_ITERATIONS))
+
+    for phase, duration in timings.items():
+        logger.info(f"Startup phase {phase}: {duration:.0f} ms")
+    logger.info("Models preloaded successfully")
+    return timings
 
 
 # ===================================
 
 
-def extract_digits_from_id(id_image_path, conf_threshold=0.25):
+def extract_digits_from_id(id_image_path, conf_threshold=0.25, region=None):
     """
     Extract digits from an ID card image and return them as a string
     
     Args:
         id_image_path: Path to the ID card image
         conf_threshold: Confidence threshold for predictions
+        region: Optional (x1, y1, x2, y2); only digits centred inside it are
+            kept (e.g. the national ID line of a rectified card)
     
     Returns:
         tuple: (digit_string, list of detection details)
     """
-    model = get_id_model()
-
     # Load image
     image = cv2.imread(id_image_path)
     if image is None:
         raise ValueError(f"Failed to load image: {id_image_path}")
 
+    return extract_digits(image, conf_threshold, region)
+
+
+def extract_digits(image, conf_threshold=0.25, region=None):
+    """
+    Extract digits from an in-memory ID card image
+    (see extract_digits_from_id for the arguments and return value)
+    """
+    model = get_id_model()
+
     # Run inference
     detections = model.predict(image, conf=conf_threshold)
 
@@ -354,6 +671,10 @@ def extract_digits_from_id(id_image_path, conf_threshold=0.25):
     for det in detections:
         box = det['box']
         x_center = (box[0] + box[2]) / 2
+        y_center = (box[1] + box[3]) / 2
+        if region is not None and not (region[0] <= x_center <= region[2] and
+                                       region[1] <= y_center <= region[3]):
+            continue
 
         detection_list.append({
             'digit': model.names[det['class']],
@@ -368,32 +689,45 @@ def extract_digits_from_id(id_image_path, conf_threshold=0.25):
     # Extract digits as string
     digit_string = ''.join([d['digit'] for d in detection_list])
 
-    logger.debug(
-        f"Extracted ID: {digit_string} ({len(detection_list)} digits)")
+    logger.debug("Extracted ID: %s (%d digits)", digit_string,
+                 len(detection_list))
 
     return digit_string, detection_list
 
 
-def predict_id(path, request_id='default'):
+def load_image(path) -> np.ndarray:
+    """Decode an image file, raising ValueError if it cannot be read"""
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Failed to load image: {path}")
+    return image
+
+
+def predict_id(path, request_id='default', image=None):
     """
     Run YOLO prediction on ID card image
     
     Args:
         path: Path to the image file
         request_id: Unique identifier for this request (for folder isolation)
+        image: Already decoded image at path (read from disk if None)
     
     Returns:
-        tuple: (detections, save_dir)
+        tuple: (detections, save_dir); each detection carries its
+            "class_name", resolved with the model that produced it
     """
+    # Fetch the model once: a hot swap mid-request must not pair these
+    # detections with another version's class names
     model = get_class_model()
 
     # Load image
-    image = cv2.imread(path)
     if image is None:
-        raise ValueError(f"Failed to load image: {path}")
+        image = load_image(path)
 
     # Run inference
     detections = model.predict(image, conf=CONFIDENCE_THRESHOLD)
+    for det in detections:
+        det['class_name'] = model.names.get(det['class'], str(det['class']))
 
     # Create save directory for this request
     save_dir = os.path.join(RUNS_DIR, request_id)
@@ -403,9 +737,8 @@ def predict_id(path, request_id='default'):
     img_annotated = image.copy()
     for det in detections:
         box = det['box']
-        cls = det['class']
         conf = det['confidence']
-        class_name = model.names.get(cls, str(cls))
+        class_name = det['class_name']
 
         # Draw box
         x1, y1, x2, y2 = map(int, box)
@@ -426,7 +759,7 @@ def predict_id(path, request_id='default'):
     return detections, save_dir
 
 
-def save_top_right_boxes(path, save_dir, detections):
+def save_top_right_boxes(path, save_dir, detections, image=None):
     """
     Save the top 3 topmost boxes (excluding "egyptian-id" and "pic") to folders named "1", "2", and "3"
     Also saves "egyptian-id" crop if detected
@@ -435,14 +768,14 @@ def save_top_right_boxes(path, save_dir, detections):
         path: Original image path
         save_dir: Directory to save crops
         detections: List of detection dictionaries from predict_id
+        image: Already decoded image at path (read from disk if None)
     """
     # Load original image
-    original_img = cv2.imread(path)
+    original_img = image if image is not None else cv2.imread(path)
     if original_img is None:
         raise ValueError(f"Failed to load image: {path}")
 
     file_name = os.path.basename(path)
-    model = get_class_model()
 
     # Convert detections to boxes_info format
     boxes_info = []
@@ -450,7 +783,7 @@ def save_top_right_boxes(path, save_dir, detections):
         box = det['box']
         cls = det['class']
         conf = det['confidence']
-        class_name = model.names.get(cls, str(cls))
+        class_name = det['class_name']
 
         x1, y1, x2, y2 = box
         center_x = (x1 + x2) / 2
@@ -510,19 +843,19 @@ def save_top_right_boxes(path, save_dir, detections):
 
         if x2 <= x1 or y2 <= y1:
             logger.warning(
-                f"Invalid crop region for box #{i}: ({x1},{y1})-({x2},{y2}), skipping"
-            )
+                "Invalid crop region for box #%d: (%d,%d)-(%d,%d), skipping", i,
+                x1, y1, x2, y2)
             continue
 
         cropped = original_img[y1:y2, x1:x2]
         if cropped.size == 0:
-            logger.warning(f"Empty crop for box #{i}, skipping")
+            logger.warning("Empty crop for box #%d, skipping", i)
             continue
 
         output_path = os.path.join(crops_dir, str(i), file_name)
         cv2.imwrite(output_path, cropped)
-        logger.debug(
-            f"Saved box #{i} ({box_info['class_name']}) to: {output_path}")
+        logger.debug("Saved box #%d (%s) to: %s", i, box_info['class_name'],
+                     output_path)
 
     # Save egyptian-id crop if found
     egyptian_id_boxes = [
@@ -543,13 +876,281 @@ def save_top_right_boxes(path, save_dir, detections):
             if cropped.size > 0:
                 output_path = os.path.join(crops_dir, 'egyptian-id', file_name)
                 cv2.imwrite(output_path, cropped)
-                logger.debug(f"Saved egyptian-id crop to: {output_path}")
+                logger.debug("Saved egyptian-id crop to: %s", output_path)
             else:
                 logger.warning("Empty crop for egyptian-id, skipping")
         else:
             logger.warning(
-                f"Invalid crop region for egyptian-id: ({x1},{y1})-({x2},{y2}), skipping"
-            )
+                "Invalid crop region for egyptian-id: (%d,%d)-(%d,%d), skipping",
+                x1, y1, x2, y2)
+
+
+def save_template_crops(path, save_dir, detections, image=None) -> bool:
+    """
+    Fast path of save_top_right_boxes for well-aligned cards
+    Rectifies the confidently detected "egyptian-id" card and cuts the text
+    fields from the card template instead of selecting field detections.
+    Writes the same crops layout ("1", "2", "3", "egyptian-id"), with the
+    rectified card as the "egyptian-id" crop.
+
+    Args:
+        path: Original image path
+        save_dir: Directory to save crops
+        detections: List of detection dictionaries from predict_id
+        image: Already decoded image at path (read from disk if None)
+
+    Returns:
+        bool: False if the template checks failed (nothing was written)
+    """
+    cards = [det for det in detections if det['class_name'] == 'egyptian-id']
+    if not cards:
+        return False
+    card_det = max(cards, key=lambda det: det['confidence'])
+    if card_det['confidence'] < TEMPLATE_MIN_CONFIDENCE:
+        logger.debug("Template path skipped: card confidence %.2f",
+                     card_det['confidence'])
+        return False
+
+    original_img = image if image is not None else cv2.imread(path)
+    if original_img is None:
+        raise ValueError(f"Failed to load image: {path}")
+
+    card, homography, reason = card_template.rectify_card(
+        original_img, card_det['box'])
+    if card is None:
+        logger.debug("Template path skipped: %s", reason)
+        return False
+
+    # Most confident detection of each field, to cross-check the template
+    field_boxes = {}
+    for det in sorted(detections, key=lambda det: det['confidence']):
+        field_boxes[det['class_name']] = det['box']
+    reason = card_template.check_template(card, homography, field_boxes)
+    if reason:
+        logger.debug("Template path skipped: %s", reason)
+        return False
+
+    file_name = os.path.basename(path)
+    crops_dir = os.path.join(save_dir, 'crops')
+    fields = card_template.cut_fields(card)
+    for slot, name in enumerate(card_template.TEXT_FIELDS, start=1):
+        os.makedirs(os.path.join(crops_dir, str(slot)), exist_ok=True)
+        cv2.imwrite(os.path.join(crops_dir, str(slot), file_name),
+                    fields[name])
+    os.makedirs(os.path.join(crops_dir, 'egyptian-id'), exist_ok=True)
+    cv2.imwrite(os.path.join(crops_dir, 'egyptian-id', file_name), card)
+    return True
+
+
+def template_fast_path_enabled() -> bool:
+    """Whether save_field_crops tries the template fast path"""
+    if TEMPLATE_FAST_PATH == 'auto':
+        return card_template.is_calibrated()
+    return TEMPLATE_FAST_PATH in ('1', 'true', 'yes')
+
+
+def save_field_crops(path, save_dir, detections, image=None) -> str:
+    """
+    Save the field crops, from template geometry when the card is well
+    aligned, otherwise from the per-field detections
+    (image: already decoded image at path, read from disk if None)
+
+    Returns:
+        str: 'template' or 'detection', the path that produced the crops
+    """
+    if (template_fast_path_enabled()
+            and save_template_crops(path, save_dir, detections, image)):
+        return 'template'
+    save_top_right_boxes(path, save_dir, detections, image)
+    return 'detection'
+
+
+def id_number_region(crop_path: str):
+    """Region of the "egyptian-id" crop holding the national ID number"""
+    # On a rectified card only the national ID line holds the number
+    if crop_path == 'template':
+        return card_template.region_pixels(card_template.ID_FIELD)
+    return None
+
+
+def read_text_fields(images) -> Dict[str, str]:
+    """
+    Run PaddleOCR on the three text crops
+
+    Args:
+        images: First name, second name and location crops (paths or arrays)
+
+    Returns:
+        dict: first_name, second_name and location
+    """
+    return read_text_fields_batch([images])[0]
+
+
+def read_text_fields_batch(cards) -> List[Dict[str, str]]:
+    """
+    Run PaddleOCR on the text crops of several cards in a single call
+
+    Args:
+        cards: Per card, the first name, second name and location crops
+
+    Returns:
+        list: Per card, a dict with first_name, second_name and location
+    """
+    images = [image for card in cards for image in card]
+    if not images:
+        return []
+    ocr = get_ocr_model()
+    with _OCR_LOCK:
+        results = ocr.predict(images)
+    # Arabic lines are recognized right to left
+    texts = [' '.join(reversed(result['rec_texts'])) for result in results]
+    field_count = len(TEXT_FIELD_KEYS)
+    return [
+        dict(zip(TEXT_FIELD_KEYS, texts[i:i + field_count]))
+        for i in range(0, len(texts), field_count)
+    ]
+
+
+def group_detections_by_card(detections) -> List[List[Dict]]:
+    """
+    Split the detections of a scanned sheet into one group per card
+
+    Each group starts with its "egyptian-id" detection, followed by the
+    field detections whose centre lies inside that card. Cards are ordered
+    row by row, left to right.
+
+    Args:
+        detections: List of detection dictionaries from predict_id
+
+    Returns:
+        list: Detection groups, one per card
+    """
+    cards = [det for det in detections if det['class_name'] == 'egyptian-id']
+    if not cards:
+        return []
+
+    # Cards whose centres are within half a card height share a row
+    row_height = float(np.median([d['box'][3] - d['box'][1]
+                                  for d in cards])) or 1.0
+    cards.sort(key=lambda d: (round(
+        (d['box'][1] + d['box'][3]) / 2 / row_height), d['box'][0]))
+
+    groups = [[card] for card in cards]
+    for det in detections:
+        if det['class_name'] == 'egyptian-id':
+            continue
+        center_x = (det['box'][0] + det['box'][2]) / 2
+        center_y = (det['box'][1] + det['box'][3]) / 2
+        for group in groups:
+            x1, y1, x2, y2 = group[0]['box']
+            if x1 <= center_x <= x2 and y1 <= center_y <= y2:
+                group.append(det)
+                break
+    return groups
+
+
+def process_id_sheet(image_path: str, request_id: str):
+    """
+    Process every ID card in one image (e.g. a flatbed scan of a sheet)
+    The class model runs once for the sheet; the text fields of all cards
+    go through PaddleOCR in one batch.
+
+    Args:
+        image_path: Path to the uploaded image
+        request_id: Unique identifier for this request (for isolated folders)
+
+    Returns:
+        dict: {"cards": [...]} with, per card, its "box" and either the
+            process_id_card fields or an "error"; {"error": ...} if no card
+            was found
+    """
+    save_dir = None
+    stage_ms = {}
+    stage_start = time.perf_counter()
+    profile = start_request_profile(request_id)
+
+    def end_stage(stage):
+        nonlocal stage_start
+        now = time.perf_counter()
+        stage_ms[f'{stage}_ms'] = round((now - stage_start) * 1000, 1)
+        stage_start = now
+
+    try:
+        logger.info("[%s] Starting ID sheet processing pipeline", request_id)
+        # Decode the sheet once for detection and every card's crops
+        sheet = load_image(image_path)
+        detections, save_dir = predict_id(image_path, request_id, sheet)
+        end_stage('detect')
+
+        groups = group_detections_by_card(detections)
+        logger.info("[%s] %d card(s) found on sheet", request_id, len(groups))
+        if not groups:
+            return {"error": "Invalid National ID Photo"}
+
+        base_name = os.path.basename(image_path)
+        cards, crop_dirs = [], []
+        for index, group in enumerate(groups):
+            card = {'box': [round(float(v), 1) for v in group[0]['box']]}
+            cards.append(card)
+            card_dir = os.path.join(save_dir, f'card_{index}')
+            crops_dir = os.path.join(card_dir, 'crops')
+            try:
+                card['crop_path'] = save_field_crops(image_path, card_dir,
+                                                     group, sheet)
+                # Degenerate boxes are skipped, leaving a field without crop
+                field_paths = [
+                    os.path.join(crops_dir, str(slot), base_name)
+                    for slot in range(1, len(TEXT_FIELD_KEYS) + 1)
+                ]
+                if not all(os.path.exists(p) for p in field_paths):
+                    raise ValueError(
+                        "Failed to extract all required fields from ID")
+                crop_dirs.append((card, crops_dir, field_paths))
+            except ValueError as e:
+                logger.warning("[%s] Card %d rejected: %s", request_id, index,
+                               e)
+                card['error'] = "Invalid National ID Photo"
+        end_stage('crop')
+
+        texts = read_text_fields_batch(
+            [field_paths for _, _, field_paths in crop_dirs])
+        end_stage('ocr')
+
+        for (card, crops_dir, _), card_texts in zip(crop_dirs, texts):
+            card.update(card_texts)
+            card['id_number'] = ""
+            id_img_path = os.path.join(crops_dir, 'egyptian-id', base_name)
+            if os.path.exists(id_img_path):
+                card['id_number'], _ = extract_digits_from_id(
+                    id_img_path,
+                    conf_threshold=ID_DIGIT_CONFIDENCE,
+                    region=id_number_region(card.pop('crop_path')))
+        end_stage('digits')
+
+        for card in cards:
+            card.pop('crop_path', None)
+        logger.info("[%s] ✓ Sheet pipeline complete (%d cards)",
+                    request_id,
+                    len(cards),
+                    extra={'fields': stage_ms})
+        return {"cards": cards}
+
+    except Exception as e:
+        logger.error("[%s] ✗ Failed: %s",
+                     request_id,
+                     e,
+                     exc_info=True,
+                     extra={'fields': stage_ms})
+        return {"error": str(e)}
+
+    finally:
+        finish_request_profile(profile, stage_ms)
+        if save_dir and os.path.exists(save_dir):
+            try:
+                shutil.rmtree(save_dir)
+            except Exception as cleanup_error:
+                logger.error("[%s] Cleanup failed: %s", request_id,
+                             cleanup_error)
 
 
 def process_id_card(image_path: str, request_id: str):
@@ -562,27 +1163,43 @@ def process_id_card(image_path: str, request_id: str):
         request_id: Unique identifier for this request (for isolated folders)
     """
     save_dir = None
+    # Per-stage durations (ms), logged as structured fields
+    stage_ms = {}
+    stage_start = time.perf_counter()
+    profile = start_request_profile(request_id)
+
+    def end_stage(stage):
+        nonlocal stage_start
+        now = time.perf_counter()
+        stage_ms[f'{stage}_ms'] = round((now - stage_start) * 1000, 1)
+        stage_start = now
 
     try:
         # Run YOLO detection with unique request ID
-        logger.info(f"[{request_id}] Starting ID card processing pipeline")
+        logger.info("[%s] Starting ID card processing pipeline", request_id)
 
-        detections, save_dir = predict_id(image_path, request_id)
+        # Decoded once for detection and cropping
+        image = load_image(image_path)
+        detections, save_dir = predict_id(image_path, request_id, image)
+        end_stage('detect')
 
-        logger.info(
-            f"[{request_id}] YOLO detection completed, ({len(detections)} objects found)"
-        )
+        logger.info("[%s] YOLO detection completed, (%d objects found)",
+                    request_id, len(detections))
 
         if not save_dir:
             raise ValueError("Failed to process image")
 
         # Save cropped regions
+        crop_path = 'detection'
         try:
-            save_top_right_boxes(image_path, save_dir, detections)
-            logger.debug(f"[{request_id}] Cropping completed")
+            crop_path = save_field_crops(image_path, save_dir, detections,
+                                         image)
+            end_stage('crop')
+            logger.debug("[%s] Cropping completed (%s)", request_id,
+                         crop_path)
         except ValueError as e:
             if "No boxes detected" in str(e) or "Not enough boxes" in str(e):
-                logger.warning(f"[{request_id}] Invalid ID card photo: {e}")
+                logger.warning("[%s] Invalid ID card photo: %s", request_id, e)
                 return {"error": "Invalid National ID Photo"}
 
         # Get paths to cropped images
@@ -599,50 +1216,49 @@ def process_id_card(image_path: str, request_id: str):
             raise ValueError("Failed to extract all required fields from ID")
 
         # OCR processing
-        logger.info(f"[{request_id}] Running PaddleOCR on text fields")
-        ocr = get_ocr_model()
-
-        first = ' '.join(
-            reversed(ocr.predict(firstname_img_path)[0]['rec_texts']))
-        logger.debug(f"[{request_id}] First name OCR finished")
-
-        second = ' '.join(
-            reversed(ocr.predict(secondname_img_path)[0]['rec_texts']))
-        logger.debug(f"[{request_id}] Second name OCR: finished")
+        logger.info("[%s] Running PaddleOCR on text fields", request_id)
+        texts = read_text_fields(
+            [firstname_img_path, secondname_img_path, location_img_path])
+        end_stage('ocr')
 
-        loc = ' '.join(reversed(
-            ocr.predict(location_img_path)[0]['rec_texts']))
-        logger.debug(f"[{request_id}] Location OCR: finished")
-
-        logger.info(f"[{request_id}] PaddleOCR completed")
+        logger.info("[%s] PaddleOCR completed", request_id)
 
         # Extract ID number if available
         id_number = ""
         if os.path.exists(id_img_path):
-            logger.debug(f"[{request_id}] Extracting national ID number")
+            logger.debug("[%s] Extracting national ID number", request_id)
             id_number, _ = extract_digits_from_id(
-                id_img_path, conf_threshold=ID_DIGIT_CONFIDENCE)
-            logger.debug(
-                f"[{request_id}] ID extraction completed, {id_number[:4]}****")
+                id_img_path,
+                conf_threshold=ID_DIGIT_CONFIDENCE,
+                region=id_number_region(crop_path))
+            end_stage('digits')
+            logger.debug("[%s] ID extraction completed, %s****", request_id,
+                         id_number[:4])
 
-        logger.info(f"[{request_id}] ✓ Processing pipeline complete")
+        logger.info("[%s] ✓ Processing pipeline complete",
+                    request_id,
+                    extra={'fields': {
+                        **stage_ms, 'crop_path': crop_path
+                    }})
 
-        return {
-            "first_name": first,
-            "second_name": second,
-            "location": loc,
-            "id_number": id_number
-        }
+        return {**texts, "id_number": id_number}
 
     except Exception as e:
-        logger.error(f"[{request_id}] ✗ Failed: {str(e)}", exc_info=True)
+        logger.error("[%s] ✗ Failed: %s",
+                     request_id,
+                     e,
+                     exc_info=True,
+                     extra={'fields': stage_ms})
         return {"error": str(e)}
 
     finally:
+        finish_request_profile(profile, stage_ms)
+
         # Cleanup: remove all generated files and folders
         if save_dir and os.path.exists(save_dir):
             try:
                 shutil.rmtree(save_dir)
-                logger.debug(f"[{request_id}] Cleanup complete")
+                logger.debug("[%s] Cleanup complete", request_id)
             except Exception as cleanup_error:
-                logger.error(f"[{request_id}] Cleanup failed: {cleanup_error}")
+                logger.error("[%s] Cleanup failed: %s", request_id,
+                             cleanup_error)
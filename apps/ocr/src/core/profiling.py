@@ -0,0 +1,177 @@
+"""
+Sampled per-request profiling for Egyptian ID OCR service
+Profiles 1 in PROFILE_SAMPLE_RATE requests (cProfile + OpenVINO per-layer
+counters) and records any request slower than PROFILE_SLOW_MS, writing
+bounded, rotated JSON artifacts tagged with the request id
+"""
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import itertools
+import contextvars
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+from ..config import logger
+
+# Profile 1 in N requests with cProfile (0 disables sampling)
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+# Record stage timings/counters of requests slower than this (0 disables)
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', '0'))
+# Collect OpenVINO per-layer performance counters (compiles with PERF_COUNT)
+PROFILE_OV_COUNTERS = os.getenv('PROFILE_OV_COUNTERS',
+                                'false').lower() in ('1', 'true', 'yes')
+# Keep at most this many artifacts, oldest are deleted first
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR',
+    os.path.join(
+        os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        'profiles'))
+
+# Layers / functions kept per artifact
+TOP_LAYERS = 15
+TOP_FUNCTIONS = 30
+
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or PROFILE_SLOW_MS > 0
+
+_CURRENT_PROFILE = contextvars.ContextVar('request_profile', default=None)
+_REQUEST_COUNTER = itertools.count(1)
+
+
+class RequestProfile:
+    """Profiling data collected while one request is processed"""
+
+    def __init__(self, request_id: str, sampled: bool):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # model name -> layer type -> accumulated real time (ms)
+        self.layer_types = defaultdict(lambda: defaultdict(float))
+        # model name -> layer name -> accumulated real time (ms)
+        self.layers = defaultdict(lambda: defaultdict(float))
+        self.profiler = cProfile.Profile() if sampled else None
+        self.token = None
+
+    def add_openvino_counters(self, model_name: str, infer_request):
+        """Accumulate per-layer counters of a finished infer request"""
+        for info in infer_request.profiling_info:
+            if info.status != info.Status.EXECUTED:
+                continue
+            real_ms = info.real_time.total_seconds() * 1000
+            self.layer_types[model_name][info.node_type] += real_ms
+            self.layers[model_name][
+                f"{info.node_name} ({info.exec_type})"] += real_ms
+
+    def to_dict(self, duration_ms: float) -> Dict:
+        report = {
+            'request_id': self.request_id,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'duration_ms': round(duration_ms, 1),
+            'sampled': self.sampled,
+            'slow': PROFILE_SLOW_MS > 0 and duration_ms >= PROFILE_SLOW_MS,
+            'stages': self.stages,
+        }
+        if self.layers:
+            report['openvino'] = {
+                model: {
+                    'by_type': _top(self.layer_types[model], TOP_LAYERS),
+                    'top_layers': _top(layers, TOP_LAYERS)
+                }
+                for model, layers in self.layers.items()
+            }
+        if self.profiler:
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            report['python'] = stream.getvalue().splitlines()
+        return report
+
+
+def _top(values: Dict[str, float], count: int) -> Dict[str, float]:
+    ordered = sorted(values.items(), key=lambda item: item[1], reverse=True)
+    return {name: round(ms, 3) for name, ms in ordered[:count]}
+
+
+def start_request_profile(request_id: str) -> Optional[RequestProfile]:
+    """
+    Start profiling a request if profiling is enabled
+    Every request is tracked when PROFILE_SLOW_MS is set (only cheap
+    timings and counters); 1 in PROFILE_SAMPLE_RATE also runs cProfile.
+    """
+    if not PROFILING_ENABLED:
+        return None
+    sampled = (PROFILE_SAMPLE_RATE > 0
+               and next(_REQUEST_COUNTER) % PROFILE_SAMPLE_RATE == 0)
+    if not sampled and PROFILE_SLOW_MS <= 0:
+        return None
+
+    profile = RequestProfile(request_id, sampled)
+    profile.token = _CURRENT_PROFILE.set(profile)
+    if profile.profiler:
+        profile.profiler.enable()
+    return profile
+
+
+def finish_request_profile(profile: Optional[RequestProfile],
+                           stages: Dict[str, float]):
+    """Stop profiling and write an artifact if sampled or slow"""
+    if profile is None:
+        return
+    if profile.profiler:
+        profile.profiler.disable()
+    _CURRENT_PROFILE.reset(profile.token)
+
+    duration_ms = (time.perf_counter() - profile.start) * 1000
+    slow = PROFILE_SLOW_MS > 0 and duration_ms >= PROFILE_SLOW_MS
+    if not (profile.sampled or slow):
+        return
+
+    profile.stages = dict(stages)
+    try:
+        _write_artifact(profile.to_dict(duration_ms), profile.request_id)
+    except Exception as e:
+        logger.warning("Failed to write profile for %s: %s",
+                       profile.request_id, e)
+
+
+def record_openvino_counters(model_name: str, infer_request):
+    """Called after each OpenVINO inference; no-op unless profiling"""
+    if not PROFILE_OV_COUNTERS:
+        return
+    profile = _CURRENT_PROFILE.get()
+    if profile is not None:
+        profile.add_openvino_counters(model_name, infer_request)
+
+
+def _write_artifact(report: Dict, request_id: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(PROFILE_DIR, f"{stamp}_{request_id}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    logger.info("Profile written for %s (%.0f ms): %s", request_id,
+                report['duration_ms'], path)
+    _rotate()
+
+
+def _rotate():
+    """Delete the oldest artifacts beyond PROFILE_MAX_FILES"""
+    files = [
+        os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)
+        if name.endswith('.json')
+    ]
+    if len(files) <= PROFILE_MAX_FILES:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - PROFILE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
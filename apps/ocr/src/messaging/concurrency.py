@@ -0,0 +1,199 @@
+"""
+Adaptive concurrency limit for the OCR consumer
+AIMD controller: the limit grows by one while the consumer is saturated,
+latency is within target and CPU has headroom, and is cut multiplicatively
+when latency exceeds the target. The consumer applies the limit as the
+channel prefetch, so the broker never hands out more work than the limit.
+"""
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from ..config import logger
+
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+def _read_ints(path: str) -> list:
+    with open(path, 'r') as f:
+        return [int(v) for v in f.read().split()]
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of this container's cgroup (in CPUs), None if unlimited"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open(os.path.join(CGROUP_ROOT, 'cpu.max'), 'r') as f:
+            quota, period = f.read().split()[:2]
+        if quota == 'max':
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    # cgroup v1: quota of -1 means unlimited
+    try:
+        quota, = _read_ints(os.path.join(CGROUP_ROOT, 'cpu',
+                                         'cpu.cfs_quota_us'))
+        period, = _read_ints(
+            os.path.join(CGROUP_ROOT, 'cpu', 'cpu.cfs_period_us'))
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def cpu_capacity() -> float:
+    """CPUs this process may use: its affinity mask capped by the quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    return min(float(cpus), quota) if quota else float(cpus)
+
+
+def available_cpus() -> int:
+    """Whole CPUs this process may use (at least one)"""
+    return max(1, int(cpu_capacity()))
+
+
+class AIMDConcurrencyLimit:
+
+    def __init__(self,
+                 initial: int,
+                 min_limit: int,
+                 max_limit: int,
+                 target_latency_ms: float,
+                 cpu_high_watermark: float = 0.85,
+                 decrease_factor: float = 0.75,
+                 min_samples: int = 5,
+                 cpus: Optional[float] = None):
+        """
+        Args:
+            initial: Starting limit
+            min_limit: Lower bound of the limit
+            max_limit: Upper bound of the limit
+            target_latency_ms: Latency budget for the window p90
+            cpu_high_watermark: CPU utilization (0-1) above which the limit
+                is not raised
+            decrease_factor: Multiplier applied when latency is over target
+            min_samples: Completed requests per adjustment window (at least
+                the current limit)
+            cpus: CPU capacity the process' CPU time is measured against
+                (default: cpu_capacity(), pass a share when the quota is
+                split between worker processes)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial))
+        self.target_latency_ms = target_latency_ms
+        self.cpu_high_watermark = cpu_high_watermark
+        self.decrease_factor = decrease_factor
+        self.min_samples = min_samples
+
+        self.in_flight = 0
+        self.cpu_utilization = 0.0
+        self.last_p90_ms = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self._cpus = cpus or cpu_capacity()
+        self._lock = threading.Lock()
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window = deque()
+        self._peak_in_flight = self.in_flight
+        self._saturated = False
+        self._window_wall = time.monotonic()
+        self._window_cpu = time.process_time()
+
+    def acquire(self):
+        """A request started"""
+        with self._lock:
+            self.in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    def mark_saturated(self):
+        """
+        The caller could not start more work under the current limit
+        (e.g. every lane is at its share of the limit)
+        """
+        with self._lock:
+            self._saturated = True
+
+    def release(self, latency_ms: Optional[float]) -> Optional[int]:
+        """
+        A request finished
+
+        Args:
+            latency_ms: Request latency, None to leave it out of the window
+
+        Returns:
+            int: The new limit if it changed, otherwise None
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency_ms is None:
+                return None
+            self._window.append(latency_ms)
+            if len(self._window) < max(self.min_samples, self.limit):
+                return None
+            return self._adjust()
+
+    def _measure_cpu(self) -> float:
+        """This process' CPU time as a share of its CPU capacity"""
+        # Node-wide signals (load average) would follow other tenants' load
+        wall = time.monotonic() - self._window_wall
+        if wall <= 0:
+            return 0.0
+        return (time.process_time() - self._window_cpu) / (wall * self._cpus)
+
+    def _adjust(self) -> Optional[int]:
+        p90 = float(np.percentile(self._window, 90))
+        saturated = self._saturated or self._peak_in_flight >= self.limit
+        self.cpu_utilization = self._measure_cpu()
+        self.last_p90_ms = p90
+
+        limit = self.limit
+        if p90 > self.target_latency_ms:
+            limit = max(self.min_limit, int(limit * self.decrease_factor))
+        elif saturated and self.cpu_utilization < self.cpu_high_watermark:
+            limit = min(self.max_limit, limit + 1)
+
+        # Judge the new limit on requests admitted under it only
+        self._reset_window()
+        if limit == self.limit:
+            return None
+
+        if limit > self.limit:
+            self.increases += 1
+        else:
+            self.decreases += 1
+        # Increases are routine under load, decreases signal overload
+        log = logger.debug if limit > self.limit else logger.info
+        log(f"Concurrency limit {self.limit} -> {limit} "
+            f"(p90 {p90:.0f} ms, target {self.target_latency_ms:.0f} ms, "
+            f"CPU {self.cpu_utilization:.0%})")
+        self.limit = limit
+        return limit
+
+    def snapshot(self) -> Dict:
+        """Current state, exposed as a metric"""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'minLimit': self.min_limit,
+                'maxLimit': self.max_limit,
+                'inFlight': self.in_flight,
+                'targetLatencyMs': self.target_latency_ms,
+                'lastP90Ms': round(self.last_p90_ms, 1),
+                'cpuUtilization': round(self.cpu_utilization, 3),
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
@@ -0,0 +1,59 @@
+"""
+Priority lanes for the OCR consumer
+Each lane is a queue consumed on its own channel. Lanes are listed in
+priority order: a free worker always takes the highest-priority pending
+message, and lower lanes may only use a share of the concurrency limit so
+interactive requests never wait for a worker behind background work.
+"""
+from collections import deque
+from typing import List, Optional
+
+from .metrics import LatencyStats
+
+
+class Lane:
+    """A consumed queue with its local backlog and latency metrics"""
+
+    def __init__(self, name: str, queue_name: str, max_share: float = 1.0):
+        """
+        Args:
+            name: Lane name used in metrics (e.g. interactive, bulk)
+            queue_name: RabbitMQ queue consumed by the lane
+            max_share: Fraction of the concurrency limit the lane may occupy
+        """
+        self.name = name
+        self.queue_name = queue_name
+        self.max_share = max_share
+        self.channel = None
+        # Delivered messages waiting for a worker
+        self.pending = deque()
+        self.running = 0
+        self.latency = LatencyStats()
+
+    def capacity(self, limit: int) -> int:
+        """
+        Workers this lane may occupy (also its channel prefetch)
+        A shared lane always leaves a worker for the lanes above it, so the
+        consumer keeps the limit at 2 or more while it has such a lane. The
+        result is never 0: a prefetch_count of 0 means unlimited.
+        """
+        if self.max_share >= 1:
+            return limit
+        return max(1, min(int(limit * self.max_share), limit - 1))
+
+    def snapshot(self, limit: int) -> dict:
+        return {
+            'queue': self.queue_name,
+            'pending': len(self.pending),
+            'running': self.running,
+            'capacity': self.capacity(limit),
+            'latency': self.latency.snapshot()
+        }
+
+
+def next_lane(lanes: List[Lane], limit: int) -> Optional[Lane]:
+    """Highest-priority lane with a pending message and spare capacity"""
+    for lane in lanes:
+        if lane.pending and lane.running < lane.capacity(limit):
+            return lane
+    return None
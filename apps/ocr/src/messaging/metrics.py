@@ -0,0 +1,55 @@
+"""
+In-process request metrics for Egyptian ID OCR service
+Rolling latency windows reported by the health check and ocr.metrics
+"""
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LatencyStats:
+    """Request count, errors and latency percentiles over a rolling window"""
+
+    def __init__(self, window: int = 500):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+
+    def record(self, latency_ms: float, ok: bool = True):
+        with self._lock:
+            self._latencies.append(latency_ms)
+            self.count += 1
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            if not self._latencies:
+                return 0.0
+            return float(np.percentile(self._latencies, q))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            count, errors = self.count, self.errors
+        snapshot = {'count': count, 'errors': errors}
+        if latencies:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            snapshot.update(p50Ms=round(float(p50), 1),
+                            p95Ms=round(float(p95), 1),
+                            p99Ms=round(float(p99), 1))
+        return snapshot
+
+
+def process_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (Linux), None if unknown"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / 2**20, 1)
@@ -11,10 +11,55 @@ import logging
 from pathlib import Path
 import uuid
 import shutil
-from ..config import logger
+import time
+import random
+import signal
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from ..config import logger, log_context
+from .concurrency import AIMDConcurrencyLimit, available_cpus, cpu_capacity
+from .metrics import LatencyStats, process_rss_mb
+from .lanes import Lane, next_lane
+from .stages import (get_stage, stage_queue, start_pipeline, run_stage,
+                     ocr_response, sheet_response, NEXT_STAGE,
+                     STAGE_MODELS, STAGE_BULK_QUEUES)
 
 # Import from core module
-from src.core.ocr_processor import preload_models, process_id_card
+from src.core.ocr_processor import (preload_models, process_id_card,
+                                     process_id_sheet,
+                                     start_model_watcher, MODEL_REGISTRY)
+from src.core.frame_selection import select_best_encoded, BURST_MAX_FRAMES
+
+
+class ThreadSafeChannel:
+    """
+    Channel facade for worker threads
+    BlockingConnection is not thread-safe, so publishes, acks and QoS
+    changes are scheduled onto the connection's I/O thread.
+    """
+
+    def __init__(self, connection, channel):
+        self._connection = connection
+        self._channel = channel
+
+    def _call(self, method, **kwargs):
+        self._connection.add_callback_threadsafe(
+            functools.partial(method, **kwargs))
+
+    def basic_publish(self, **kwargs):
+        self._call(self._channel.basic_publish, **kwargs)
+
+    def basic_qos(self, **kwargs):
+        self._call(self._channel.basic_qos, **kwargs)
+
+    def basic_ack(self, delivery_tag):
+        try:
+            self._call(self._channel.basic_ack, delivery_tag=delivery_tag)
+        except pika.exceptions.AMQPError as e:
+            # The broker redelivers unacked messages after a reconnect
+            logger.warning(f"Failed to ack message {delivery_tag}: {e}")
 
 
 class OCRConsumer:
@@ -28,14 +73,92 @@ class OCRConsumer:
         self.rabbitmq_password = os.getenv('RABBITMQ_PASSWORD', 'guest')
         self.rabbitmq_vhost = os.getenv('RABBITMQ_VHOST', '/')
         self.rabbitmq_queue = os.getenv('RABBIT_MQ_OCR_QUEUE', 'ocr')
-
-        # Single queue for OCR requests
-        self.queue_name = self.rabbitmq_queue
+        # Background work (backfills, retries); empty disables the public
+        # bulk lane (stage queues follow OCR_STAGE_BULK_QUEUES)
+        self.rabbitmq_bulk_queue = os.getenv('RABBIT_MQ_OCR_BULK_QUEUE',
+                                             'ocr.bulk')
+
+        # Pipeline stage run by this consumer (OCR_STAGE, default 'all');
+        # digits/text stages consume internal queues instead of the public one
+        self.stage = get_stage()
+        consumes_tasks = self.stage in NEXT_STAGE.values()
+
+        # Interactive queue for front-desk OCR requests
+        self.queue_name = (stage_queue(self.stage)
+                           if consumes_tasks else self.rabbitmq_queue)
+
+        # Lanes in priority order; bulk may only use part of the limit so
+        # interactive requests always find a free worker
+        # Stages fed by the detect stage follow the shared stage setting, so
+        # bulk tasks forwarded to them are always consumed
+        self.lanes = [Lane('interactive', self.queue_name)]
+        if consumes_tasks:
+            bulk_queue = (stage_queue(self.stage, 'bulk')
+                          if STAGE_BULK_QUEUES else '')
+        else:
+            bulk_queue = self.rabbitmq_bulk_queue
+        if bulk_queue:
+            self.lanes.append(
+                Lane('bulk', bulk_queue,
+                     float(os.getenv('OCR_BULK_MAX_SHARE', '0.5'))))
+        self._dispatch_lock = threading.Lock()
 
         # Connection and channel (initialized on connect)
         self.connection = None
         self.channel = None
 
+        # Reconnection with exponential backoff and jitter
+        self.reconnect_base_delay = float(
+            os.getenv('RABBITMQ_RECONNECT_BASE_DELAY', '1'))
+        self.reconnect_max_delay = float(
+            os.getenv('RABBITMQ_RECONNECT_MAX_DELAY', '30'))
+        # 0 retries forever
+        self.reconnect_max_attempts = int(
+            os.getenv('RABBITMQ_RECONNECT_MAX_ATTEMPTS', '0'))
+
+        # Connection state reported by the health check
+        self.state = 'starting'
+        self.reconnect_count = 0
+        self.connected_since = None
+        self.last_disconnect = None
+        self._stop_event = threading.Event()
+
+        # Adaptive concurrency: the limit is applied as the channel prefetch
+        # and messages are processed on a pool of max_limit threads
+        worker_count = int(os.getenv('OCR_WORKERS', '1'))
+        initial_concurrency = int(os.getenv('OCR_CONCURRENCY', '1'))
+        if os.getenv('OCR_ADAPTIVE_CONCURRENCY',
+                     'true').lower() in ('1', 'true', 'yes'):
+            min_concurrency = int(os.getenv('OCR_MIN_CONCURRENCY', '1'))
+            max_concurrency = int(
+                os.getenv('OCR_MAX_CONCURRENCY',
+                          str(max(1, available_cpus() // worker_count))))
+        else:
+            min_concurrency = max_concurrency = initial_concurrency
+        if len(self.lanes) > 1:
+            # Bulk work always leaves one worker for interactive requests,
+            # which needs a limit of at least 2
+            min_concurrency = max(2, min_concurrency)
+            max_concurrency = max(max_concurrency, min_concurrency)
+        self.concurrency = AIMDConcurrencyLimit(
+            initial=initial_concurrency,
+            min_limit=min_concurrency,
+            max_limit=max_concurrency,
+            target_latency_ms=float(os.getenv('OCR_TARGET_LATENCY_MS',
+                                              '4000')),
+            cpu_high_watermark=float(
+                os.getenv('OCR_CPU_HIGH_WATERMARK', '0.85')),
+            # Pre-forked workers split the container's CPU quota
+            cpus=cpu_capacity() / worker_count)
+        self.latency = LatencyStats()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.concurrency.max_limit,
+            thread_name_prefix='ocr-worker')
+
+        # Optional file mirroring the state, for orchestrator exec probes
+        # (the isUp health check cannot answer while the broker is down)
+        self.health_file = os.getenv('HEALTH_FILE', '')
+
         # Temporary directory for processing
         self.temp_base_dir = Path(os.getenv('TEMP_DIR', '/app/temp_uploads'))
         self.temp_base_dir.mkdir(parents=True, exist_ok=True)
@@ -58,22 +181,38 @@ class OCRConsumer:
                 blocked_connection_timeout=300)
 
             self.connection = pika.BlockingConnection(parameters)
-            self.channel = self.connection.channel()
-
-            # Declare single OCR queue (idempotent)
-            self.channel.queue_declare(queue=self.queue_name, durable=True)
-
-            # Process one message at a time (important for resource-limited environments)
-            self.channel.basic_qos(prefetch_count=1)
 
+            # One channel per lane so each lane has its own prefetch
+            for lane in self.lanes:
+                # Deliveries of the previous connection are redelivered
+                lane.pending.clear()
+                lane.channel = self.connection.channel()
+                # Declare lane queue (idempotent)
+                lane.channel.queue_declare(queue=lane.queue_name,
+                                           durable=True)
+                # Unacked messages are bounded by the lane's share of the
+                # current concurrency limit
+                lane.channel.basic_qos(
+                    prefetch_count=lane.capacity(self.concurrency.limit))
+                # Tasks for the next stage must not be dropped as unroutable
+                if self.stage in NEXT_STAGE:
+                    lane.channel.queue_declare(queue=stage_queue(
+                        NEXT_STAGE[self.stage], lane.name),
+                                               durable=True)
+            self.channel = self.lanes[0].channel
+
+            self.connected_since = datetime.now().isoformat(timespec='seconds')
+            self._set_state('connected')
             logger.info(f"✓ Connected to RabbitMQ at {self.rabbitmq_host}")
-            logger.info(f"✓ Listening on queue: '{self.queue_name}'")
+            for lane in self.lanes:
+                logger.info(f"✓ Listening on queue: '{lane.queue_name}' "
+                            f"({lane.name})")
 
         except Exception as e:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
             raise
 
-    def process_message(self, ch, method, properties, body):
+    def process_message(self, ch, method, properties, body, lane=None):
         """
         Process incoming messages - either health check or ID photo processing
         
@@ -90,6 +229,15 @@ class OCRConsumer:
         {
             "image_base64": "base64-encoded-egyptian-id-front-photo"
         }
+
+        Scanned sheets with several cards add "multi_card": true to the
+        payload.
+
+        Burst uploads send candidate frames of one card instead of
+        image_base64; only the best frame is processed:
+        {
+            "images_base64": ["frame-1", "frame-2", ...]
+        }
         
         Response format:
         Success: {
@@ -98,12 +246,98 @@ class OCRConsumer:
             "location": "القاهرة",
             "socialSecurityNumber": "29901011234567"
         }
+
+        Burst responses add "frameIndex": <index of the processed frame>.
+
+        Success (multi_card): {
+            "cards": [
+                {"box": [x1, y1, x2, y2], "firstName": "محمد", ...},
+                {"box": [x1, y1, x2, y2], "error": "Invalid ID photo"}
+            ]
+        }
         
         Error: {
             "error": "Invalid ID photo"
         }
         """
+        # Runs on the connection thread: queue the message on its lane
+        lane = lane or self.lanes[0]
+        lane.pending.append((time.perf_counter(),
+                             ThreadSafeChannel(self.connection, ch), method,
+                             properties, body))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start pending messages while under the limit, by lane priority"""
+        with self._dispatch_lock:
+            limit = self.concurrency.limit
+            while (not self._stop_event.is_set()
+                   and self.concurrency.in_flight < limit):
+                lane = next_lane(self.lanes, limit)
+                if lane is None:
+                    break
+                message = lane.pending.popleft()
+                lane.running += 1
+                self.concurrency.acquire()
+                self.executor.submit(self._process_in_worker, lane, *message)
+            # A lane at its share (e.g. bulk at limit - 1) is saturated even
+            # though in-flight work stays below the limit
+            if any(lane.running >= lane.capacity(limit)
+                   for lane in self.lanes):
+                self.concurrency.mark_saturated()
+
+    def _process_in_worker(self, lane, delivered_at, channel, method,
+                           properties, body):
+        """Handle one message on a worker thread and feed the controller"""
         request_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            # Every record logged while handling the message carries request_id
+            with log_context(request_id=request_id):
+                outcome = self._handle_message(channel, method, properties,
+                                               body, request_id, lane.name)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            with self._dispatch_lock:
+                lane.running -= 1
+            # Health checks would drag the latency window down
+            if outcome == 'health':
+                new_limit = self.concurrency.release(None)
+            else:
+                self.latency.record(latency_ms, ok=outcome == 'ok')
+                # Lane latency includes the wait for a free worker
+                lane.latency.record(
+                    (time.perf_counter() - delivered_at) * 1000,
+                    ok=outcome == 'ok')
+                new_limit = self.concurrency.release(latency_ms)
+            if new_limit is not None:
+                self._update_prefetch(new_limit)
+            self._dispatch()
+
+    def _update_prefetch(self, limit: int):
+        """Apply a new concurrency limit to every lane's channel"""
+        for lane in self.lanes:
+            try:
+                ThreadSafeChannel(self.connection, lane.channel).basic_qos(
+                    prefetch_count=lane.capacity(limit))
+            except pika.exceptions.AMQPError as e:
+                # connect() applies the current limit after a reconnect
+                logger.warning(f"Failed to update prefetch: {e}")
+
+    def _handle_message(self,
+                        ch,
+                        method,
+                        properties,
+                        body,
+                        request_id,
+                        lane_name='interactive'):
+        """
+        Handle one message (see process_message for the formats)
+
+        Returns:
+            str: 'ok', 'error' or 'health'
+        """
         temp_dir = None
 
         try:
@@ -111,56 +345,97 @@ class OCRConsumer:
             try:
                 message = json.loads(body)
             except json.JSONDecodeError:
-                logger.error(f"[{request_id}] Invalid JSON message")
+                logger.error("[%s] Invalid JSON message", request_id)
                 self._send_error_response(ch, properties, "Invalid ID photo")
                 ch.basic_ack(delivery_tag=method.delivery_tag)
-                return
+                return 'error'
 
-            # Check for health check pattern (isUp)
+            # Split deployment: a task handed over by the previous stage
+            if self.stage in NEXT_STAGE.values():
+                outcome = run_stage(self.stage, message, self._publisher(ch))
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return outcome
+
+            # Check for health check / metrics patterns
             pattern = message.get('pattern', {})
-            if pattern == 'ocr.isUp' or (isinstance(pattern, dict)
-                                         and pattern.get('cmd') == 'ocr.isUp'):
-                logger.info(f"[{request_id}] Health check request received")
-                self._send_response(ch, properties,
-                                    {"status": "OCR Service is running"})
+            if isinstance(pattern, dict):
+                pattern = pattern.get('cmd')
+            if pattern == 'ocr.isUp':
+                logger.info("[%s] Health check request received", request_id)
+                self._send_response(ch, properties, self.health_status())
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return 'health'
+            if pattern == 'ocr.metrics':
+                self._send_response(ch, properties, self.metrics())
                 ch.basic_ack(delivery_tag=method.delivery_tag)
-                return
+                return 'health'
 
             # Handle NestJS microservices message format
             # NestJS wraps the payload in a 'data' field
             if 'data' in message and isinstance(message['data'], dict):
                 payload = message['data']
-                logger.debug(
-                    f"[{request_id}] Extracted payload from NestJS format")
+                logger.debug("[%s] Extracted payload from NestJS format",
+                             request_id)
             else:
                 payload = message
 
             image_base64 = payload.get('image_base64')
+            frames_base64 = payload.get('images_base64')
+            burst = isinstance(frames_base64, list) and bool(frames_base64)
 
-            if not image_base64:
-                logger.error(f"[{request_id}] Missing image_base64 in message")
+            if not image_base64 and not burst:
+                logger.error("[%s] Missing image_base64 in message", request_id)
                 self._send_error_response(ch, properties, "Invalid ID photo")
                 ch.basic_ack(delivery_tag=method.delivery_tag)
-                return
+                return 'error'
 
             # Log image size
-            image_size_kb = len(
-                image_base64) * 3 / 4 / 1024  # Approximate decoded size
-            logger.info(
-                f"[{request_id}] Received Egyptian ID photo request (~{image_size_kb:.1f} KB)"
-            )
-
-            # Decode base64 image
+            image_size_kb = sum(
+                len(data) for data in (frames_base64 if burst else [
+                    image_base64
+                ])) * 3 / 4 / 1024  # Approximate decoded size
+            logger.info("[%s] Received Egyptian ID photo request (~%.1f KB)",
+                        request_id, image_size_kb)
+
+            # Decode base64 image (every candidate frame of a burst)
             try:
-                image_bytes = base64.b64decode(image_base64)
-                logger.debug(
-                    f"[{request_id}] Base64 decoded, ({len(image_bytes)} bytes)"
-                )
+                if burst:
+                    frames = [
+                        base64.b64decode(data)
+                        for data in frames_base64[:BURST_MAX_FRAMES]
+                    ]
+                else:
+                    image_bytes = base64.b64decode(image_base64)
             except Exception as e:
-                logger.error(f"[{request_id}] Failed to decode base64: {e}")
+                logger.error("[%s] Failed to decode base64: %s", request_id, e)
                 self._send_error_response(ch, properties, "Invalid ID photo")
                 ch.basic_ack(delivery_tag=method.delivery_tag)
-                return
+                return 'error'
+
+            # Pick the best frame of a burst
+            frame_index = None
+            if burst:
+                try:
+                    frame_index = select_best_encoded(frames, request_id)
+                except ValueError as e:
+                    logger.error("[%s] No usable frame in burst: %s",
+                                 request_id, e)
+                    self._send_error_response(ch, properties,
+                                              "Invalid ID photo")
+                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    return 'error'
+                except Exception as e:
+                    logger.error("[%s] Frame selection failed: %s",
+                                 request_id,
+                                 e,
+                                 exc_info=True)
+                    self._send_error_response(ch, properties,
+                                              "Invalid ID photo")
+                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    return 'error'
+                image_bytes = frames[frame_index]
+            logger.debug("[%s] Base64 decoded, (%d bytes)", request_id,
+                         len(image_bytes))
 
             # Create temporary directory for this request
             temp_dir = self.temp_base_dir / request_id
@@ -170,52 +445,133 @@ class OCRConsumer:
             temp_image_path = temp_dir / 'id_card.jpg'
             with open(temp_image_path, 'wb') as f:
                 f.write(image_bytes)
-            logger.debug(
-                f"[{request_id}] Image saved to temp: {temp_image_path}")
+            logger.debug("[%s] Image saved to temp: %s", request_id,
+                         temp_image_path)
 
-            logger.info(f"[{request_id}] Processing Egyptian ID card...")
+            multi_card = bool(payload.get('multi_card'))
+
+            # Split deployment: detect here, the other stages continue
+            if self.stage == 'detect':
+                if multi_card:
+                    logger.warning(
+                        "[%s] multi_card is not supported in stage mode",
+                        request_id)
+                    self._send_error_response(ch, properties,
+                                              "Invalid ID photo")
+                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    return 'error'
+                outcome = start_pipeline(str(temp_image_path), request_id,
+                                         properties.reply_to,
+                                         properties.correlation_id,
+                                         lane_name, self._publisher(ch),
+                                         frame_index=frame_index)
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return outcome
 
-            # Process the ID card
-            result = process_id_card(str(temp_image_path), request_id)
+            if multi_card:
+                logger.info("[%s] Processing Egyptian ID sheet...",
+                            request_id)
+                result = process_id_sheet(str(temp_image_path), request_id)
+            else:
+                logger.info("[%s] Processing Egyptian ID card...",
+                            request_id)
+                # Process the ID card
+                result = process_id_card(str(temp_image_path), request_id)
 
             # Check for errors in processing
+            outcome = 'error' if "error" in result else 'ok'
             if "error" in result:
-                logger.warning(
-                    f"[{request_id}] Processing failed: {result['error']}")
+                logger.warning("[%s] Processing failed: %s", request_id,
+                               result['error'])
                 self._send_error_response(ch, properties, "Invalid ID photo")
             else:
                 # Transform to standardized response format
-                response = {
-                    "firstName": result.get("first_name", ""),
-                    "lastName": result.get("second_name", ""),
-                    "location": result.get("location", ""),
-                    "socialSecurityNumber": result.get("id_number", "")
-                }
+                response = (sheet_response(result)
+                            if multi_card else ocr_response(result))
+                if frame_index is not None:
+                    response['frameIndex'] = frame_index
 
-                logger.info(f"[{request_id}] ✓ Completed")
-                logger.info(f"[{request_id}] Extracted all data successfully")
+                logger.info("[%s] ✓ Completed", request_id)
+                logger.info("[%s] Extracted all data successfully", request_id)
 
                 # Send success response
                 self._send_response(ch, properties, response)
 
             # Acknowledge the message
             ch.basic_ack(delivery_tag=method.delivery_tag)
+            return outcome
 
         except Exception as e:
-            logger.error(f"[{request_id}] Unexpected error: {e}",
+            logger.error("[%s] Unexpected error: %s",
+                         request_id,
+                         e,
                          exc_info=True)
             self._send_error_response(ch, properties, "Invalid ID photo")
             ch.basic_ack(delivery_tag=method.delivery_tag)
+            return 'error'
 
         finally:
             # Always cleanup temporary files
             if temp_dir and temp_dir.exists():
                 try:
                     shutil.rmtree(temp_dir)
-                    logger.debug(f"[{request_id}] Cleanup complete")
+                    logger.debug("[%s] Cleanup complete", request_id)
                 except Exception as cleanup_error:
-                    logger.warning(
-                        f"[{request_id}] Cleanup failed: {cleanup_error}")
+                    logger.warning("[%s] Cleanup failed: %s", request_id,
+                                   cleanup_error)
+
+    def health_status(self) -> dict:
+        """Current consumer state for the health check"""
+        return {
+            "status": "OCR Service is running",
+            "state": self.state,
+            "stage": self.stage,
+            "reconnects": self.reconnect_count,
+            "connectedSince": self.connected_since,
+            "lastDisconnect": self.last_disconnect,
+            "concurrencyLimit": self.concurrency.limit,
+            "models": MODEL_REGISTRY.status()
+        }
+
+    def metrics(self) -> dict:
+        """Request latency and concurrency metrics (ocr.metrics)"""
+        return {
+            "pid": os.getpid(),
+            "latency": self.latency.snapshot(),
+            "concurrency": self.concurrency.snapshot(),
+            "lanes": {
+                lane.name: lane.snapshot(self.concurrency.limit)
+                for lane in self.lanes
+            },
+            "rssMb": process_rss_mb(),
+            "modelIdleTimeout": MODEL_REGISTRY.idle_timeout,
+            "models": MODEL_REGISTRY.status()
+        }
+
+    def _set_state(self, state: str):
+        """Update connection state (and the health file if configured)"""
+        self.state = state
+        if not self.health_file:
+            return
+        try:
+            with open(self.health_file, 'w') as f:
+                json.dump(self.health_status(), f)
+        except OSError as e:
+            logger.warning(f"Failed to write health file: {e}")
+
+    def _publisher(self, ch):
+        """publish(routing_key, payload, correlation_id) for stage handlers"""
+
+        def publish(routing_key, payload, correlation_id=None):
+            ch.basic_publish(exchange='',
+                             routing_key=routing_key,
+                             body=json.dumps(payload),
+                             properties=pika.BasicProperties(
+                                 correlation_id=correlation_id,
+                                 content_type='application/json',
+                                 delivery_mode=2))
+
+        return publish
 
     def _send_response(self, ch, properties, data: dict):
         """Send success response back to client"""
@@ -251,15 +607,17 @@ class OCRConsumer:
             logger.error(f"Failed to send error response: {e}")
 
     def start_consuming(self):
-        """Start consuming messages from the OCR queue"""
+        """Start consuming messages from every lane's queue"""
         try:
             logger.info("Starting Egyptian ID OCR consumer...")
             if self.channel is None:
                 raise RuntimeError(
                     "Channel is not initialized. Call connect() first.")
-            self.channel.basic_consume(
-                queue=self.queue_name,
-                on_message_callback=self.process_message)
+            for lane in self.lanes:
+                lane.channel.basic_consume(
+                    queue=lane.queue_name,
+                    on_message_callback=functools.partial(self.process_message,
+                                                          lane=lane))
 
             logger.info(
                 "✓ OCR Consumer running. Waiting for Egyptian ID photos...")
@@ -269,9 +627,97 @@ class OCRConsumer:
             logger.error(f"Error during consumption: {e}")
             raise
 
+    def run(self):
+        """
+        Consume until stop() is called, reconnecting when the broker
+        connection drops. Models stay loaded across reconnects.
+        """
+        attempt = 0
+        while not self._stop_event.is_set():
+            try:
+                if self.connection is None or self.connection.is_closed:
+                    self.connect()
+                    if attempt:
+                        self.reconnect_count += 1
+                        logger.info(
+                            f"✓ Reconnected to RabbitMQ after {attempt} attempt(s)"
+                        )
+                    attempt = 0
+                self.start_consuming()
+            except (pika.exceptions.AMQPError, OSError) as e:
+                if self._stop_event.is_set():
+                    break
+                self.last_disconnect = datetime.now().isoformat(
+                    timespec='seconds')
+                self._set_state('reconnecting')
+                self.close()
+
+                attempt += 1
+                if 0 < self.reconnect_max_attempts < attempt:
+                    logger.error(
+                        f"Giving up after {attempt - 1} reconnect attempts")
+                    self._set_state('stopped')
+                    raise
+
+                # Exponential backoff with jitter so replicas spread out
+                delay = min(self.reconnect_max_delay,
+                            self.reconnect_base_delay * 2**(attempt - 1))
+                delay = random.uniform(delay / 2, delay)
+                logger.warning(
+                    f"RabbitMQ connection lost ({e}), reconnecting in {delay:.1f} s "
+                    f"(attempt {attempt})")
+                self._stop_event.wait(delay)
+            else:
+                # start_consuming returned: stop() was requested
+                self._drain()
+                break
+
+        self.executor.shutdown(wait=True)
+        self.close()
+        self._set_state('stopped')
+
+    def _drain(self):
+        """Let in-flight messages finish and flush their acks"""
+        try:
+            while self.concurrency.in_flight > 0 and self.connection.is_open:
+                self.connection.process_data_events(time_limit=0.1)
+            if self.connection.is_open:
+                self.connection.process_data_events(time_limit=0)
+        except (pika.exceptions.AMQPError, OSError) as e:
+            # Unacked messages are redelivered by the broker
+            logger.warning(f"Connection lost while draining: {e}")
+
+    def stop(self):
+        """
+        Stop consuming after the in-flight messages are finished
+        Safe to call from a signal handler or another thread
+        """
+        self._stop_event.set()
+        if self.connection is None or self.connection.is_closed:
+            return
+        try:
+            self.connection.add_callback_threadsafe(self._stop_consuming)
+        except Exception as e:
+            logger.warning(f"Failed to stop consuming: {e}")
+
+    def _stop_consuming(self):
+        """Cancel every lane's consumer (on the connection thread)"""
+        # The loop runs on the first lane's channel, cancel it last
+        for lane in reversed(self.lanes):
+            lane.channel.stop_consuming()
+
+    def close(self):
+        """Close the RabbitMQ connection"""
+        if self.connection is not None and self.connection.is_open:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.warning(f"Failed to close RabbitMQ connection: {e}")
+
 
 def main():
     """Main entry point for Egyptian ID OCR RabbitMQ consumer"""
+    startup_begin = time.perf_counter()
     from src.config.logger import logger as configured_logger
 
     # Load environment variables
@@ -283,15 +729,34 @@ def main():
     configured_logger.info("Queue: 'ocr'")
     configured_logger.info("=" * 60)
 
-    # Preload ML models before starting consumer
+    # Pre-fork mode: the supervisor loads models once and forks workers
+    worker_count = int(os.getenv('OCR_WORKERS', '1'))
+    if worker_count > 1:
+        from .supervisor import WorkerSupervisor
+        WorkerSupervisor(worker_count).run()
+        return
+
+    # Preload ML models before starting consumer (only the stage's models
+    # in a split deployment)
     configured_logger.info("Preloading OCR models...")
-    preload_models()
+    preload_models(models=STAGE_MODELS.get(get_stage()))
     configured_logger.info(f"✓ Models loaded successfully")
+    start_model_watcher()
 
     configured_logger.info("✓ Service started")
 
     # Create and start consumer
     consumer = OCRConsumer()
-    consumer.connect()
-    configured_logger.info("✓ OCR Service is ready to accept requests")
-    consumer.start_consuming()
+    connect_begin = time.perf_counter()
+    try:
+        consumer.connect()
+    except pika.exceptions.AMQPError:
+        configured_logger.warning("Broker unavailable, run() will retry")
+    configured_logger.info(
+        f"Startup phase connect_broker: {(time.perf_counter() - connect_begin) * 1000:.0f} ms"
+    )
+    configured_logger.info(
+        f"✓ OCR Service is ready to accept requests "
+        f"(startup took {time.perf_counter() - startup_begin:.1f} s)")
+    signal.signal(signal.SIGTERM, lambda signum, frame: consumer.stop())
+    consumer.run()
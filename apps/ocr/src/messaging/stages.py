@@ -0,0 +1,283 @@
+"""
+Distributed stage split for Egyptian ID OCR service
+With OCR_STAGE=detect|digits|text each consumer runs one pipeline stage and
+hands a compact task (JPEG crops, not the full photo) to the next stage over
+an internal queue:
+
+    public queue -> detect -> ocr.stage.digits -> digits -> ocr.stage.text
+                 -> text -> original reply_to / correlation_id
+
+Stage handlers only need a publish(routing_key, payload, correlation_id)
+callable, so they run against RabbitMQ or the InMemoryBroker stand-in.
+"""
+import os
+import json
+import time
+import uuid
+import base64
+import shutil
+from collections import defaultdict, deque
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from ..config import logger
+from ..core.ocr_processor import (load_image, predict_id, save_field_crops,
+                                  id_number_region, read_text_fields,
+                                  extract_digits, ID_DIGIT_CONFIDENCE,
+                                  TEXT_FIELD_KEYS, CLASS_MODEL_NAME,
+                                  ID_MODEL_NAME, OCR_MODEL_NAME)
+
+# 'all' runs the whole pipeline in one consumer (default)
+STAGE_ALL = 'all'
+STAGES = ('detect', 'digits', 'text')
+NEXT_STAGE = {'detect': 'digits', 'digits': 'text'}
+# Registry models each stage keeps loaded
+STAGE_MODELS = {
+    'detect': (CLASS_MODEL_NAME, ),
+    'digits': (ID_MODEL_NAME, ),
+    'text': (OCR_MODEL_NAME, )
+}
+
+STAGE_QUEUE_PREFIX = os.getenv('RABBIT_MQ_OCR_STAGE_PREFIX', 'ocr.stage.')
+# Separate internal queues for bulk-lane tasks. Shared by every stage: the
+# detect stage forwards to them and the digits/text stages consume them
+# (whatever their RABBIT_MQ_OCR_BULK_QUEUE). Off, bulk tasks share the
+# interactive stage queues.
+STAGE_BULK_QUEUES = os.getenv('OCR_STAGE_BULK_QUEUES',
+                              'true').lower() in ('1', 'true', 'yes')
+# JPEG quality of crops passed between stages
+STAGE_JPEG_QUALITY = int(os.getenv('STAGE_JPEG_QUALITY', '95'))
+TASK_VERSION = 1
+
+# publish(routing_key, payload, correlation_id)
+Publish = Callable[[str, Dict, Optional[str]], None]
+
+
+def get_stage() -> str:
+    """Pipeline stage this process runs (OCR_STAGE)"""
+    stage = os.getenv('OCR_STAGE', STAGE_ALL).strip().lower()
+    if stage != STAGE_ALL and stage not in STAGES:
+        raise ValueError(f"Unknown OCR_STAGE '{stage}', expected "
+                         f"{STAGE_ALL} or one of {', '.join(STAGES)}")
+    return stage
+
+
+def stage_queue(stage: str, lane: str = 'interactive') -> str:
+    """
+    Internal queue feeding a stage; lower lanes get their own queue unless
+    STAGE_BULK_QUEUES is off
+    """
+    queue_name = f"{STAGE_QUEUE_PREFIX}{stage}"
+    if lane == 'interactive' or not STAGE_BULK_QUEUES:
+        return queue_name
+    return f"{queue_name}.{lane}"
+
+
+def ocr_response(result: Dict) -> Dict:
+    """Map pipeline output to the response format of the OCR queue"""
+    return {
+        "firstName": result.get("first_name", ""),
+        "lastName": result.get("second_name", ""),
+        "location": result.get("location", ""),
+        "socialSecurityNumber": result.get("id_number", "")
+    }
+
+
+def sheet_response(result: Dict) -> Dict:
+    """Map process_id_sheet output to the multi-card response format"""
+    return {
+        "cards": [{
+            "box": card["box"],
+            **({
+                "error": "Invalid ID photo"
+            } if "error" in card else ocr_response(card))
+        } for card in result["cards"]]
+    }
+
+
+def encode_image(image: np.ndarray) -> str:
+    ok, buffer = cv2.imencode('.jpg', image,
+                              [cv2.IMWRITE_JPEG_QUALITY, STAGE_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Failed to encode crop")
+    return base64.b64encode(buffer.tobytes()).decode('ascii')
+
+
+def decode_image(data: str) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(data), np.uint8),
+                         cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Failed to decode crop")
+    return image
+
+
+def _reply(task: Dict, response: Dict, publish: Publish):
+    if not task.get('replyTo'):
+        logger.warning("No reply_to queue specified, skipping response")
+        return
+    publish(task['replyTo'], response, task.get('correlationId'))
+
+
+def _forward(stage: str, task: Dict, publish: Publish):
+    publish(stage_queue(NEXT_STAGE[stage], task.get('lane', 'interactive')),
+            task, None)
+
+
+def start_pipeline(image_path: str,
+                   request_id: str,
+                   reply_to: str,
+                   correlation_id: str,
+                   lane: str,
+                   publish: Publish,
+                   frame_index: Optional[int] = None) -> str:
+    """
+    Detect stage: find the card, cut the fields and forward the crops
+    frame_index (the selected frame of a burst upload) is echoed in the reply
+
+    Returns:
+        str: 'ok' if the task was forwarded, 'error' if a reply was sent
+    """
+    start = time.perf_counter()
+    task = {
+        'v': TASK_VERSION,
+        'requestId': request_id,
+        'replyTo': reply_to,
+        'correlationId': correlation_id,
+        'lane': lane,
+        'stageMs': {}
+    }
+    if frame_index is not None:
+        task['frameIndex'] = frame_index
+    save_dir = None
+    try:
+        image = load_image(image_path)
+        detections, save_dir = predict_id(image_path, request_id, image)
+        crop_path = save_field_crops(image_path, save_dir, detections, image)
+
+        base_name = os.path.basename(image_path)
+        crops_dir = os.path.join(save_dir, 'crops')
+        fields = {}
+        for slot, field in enumerate(TEXT_FIELD_KEYS, start=1):
+            crop = cv2.imread(os.path.join(crops_dir, str(slot), base_name))
+            if crop is None:
+                raise ValueError(
+                    "Failed to extract all required fields from ID")
+            fields[field] = encode_image(crop)
+        task['fields'] = fields
+
+        card = cv2.imread(os.path.join(crops_dir, 'egyptian-id', base_name))
+        task['card'] = encode_image(card) if card is not None else None
+        region = id_number_region(crop_path)
+        task['idRegion'] = list(region) if region else None
+    except Exception as e:
+        logger.warning("[%s] Detect stage failed: %s", request_id, e)
+        _reply(task, {"error": "Invalid ID photo"}, publish)
+        return 'error'
+    finally:
+        if save_dir and os.path.exists(save_dir):
+            shutil.rmtree(save_dir, ignore_errors=True)
+
+    task['stageMs']['detect'] = round((time.perf_counter() - start) * 1000, 1)
+    _forward('detect', task, publish)
+    return 'ok'
+
+
+def run_stage(stage: str, task: Dict, publish: Publish) -> str:
+    """
+    Run the digits or text stage on a task from the previous stage
+
+    Returns:
+        str: 'ok' or 'error'
+    """
+    start = time.perf_counter()
+    request_id = task.get('requestId', '')
+    try:
+        if task.get('v') != TASK_VERSION:
+            raise ValueError(f"Unsupported task version {task.get('v')}")
+        result = task.setdefault('result', {})
+        if stage == 'digits':
+            result['id_number'] = ''
+            if task.get('card'):
+                result['id_number'], _ = extract_digits(
+                    decode_image(task['card']),
+                    conf_threshold=ID_DIGIT_CONFIDENCE,
+                    region=task.get('idRegion'))
+            # The card is not needed downstream, keep the task small
+            task.pop('card', None)
+        elif stage == 'text':
+            result.update(
+                read_text_fields([
+                    decode_image(task['fields'][field])
+                    for field in TEXT_FIELD_KEYS
+                ]))
+        else:
+            raise ValueError(f"Stage '{stage}' does not consume tasks")
+    except Exception as e:
+        logger.error("[%s] %s stage failed: %s",
+                     request_id,
+                     stage,
+                     e,
+                     exc_info=True)
+        _reply(task, {"error": "Invalid ID photo"}, publish)
+        return 'error'
+
+    task['stageMs'][stage] = round((time.perf_counter() - start) * 1000, 1)
+    if stage in NEXT_STAGE:
+        _forward(stage, task, publish)
+    else:
+        logger.info("[%s] ✓ Stage pipeline complete",
+                    request_id,
+                    extra={'fields': task['stageMs']})
+        response = ocr_response(result)
+        if 'frameIndex' in task:
+            response['frameIndex'] = task['frameIndex']
+        _reply(task, response, publish)
+    return 'ok'
+
+
+class InMemoryBroker:
+    """
+    Broker stand-in for running the split pipeline in one process
+    Named FIFO queues; payloads go through JSON like on the wire.
+    """
+
+    def __init__(self):
+        self.queues = defaultdict(deque)
+        self._stage_queues = {
+            stage_queue(stage, lane): stage
+            for stage in NEXT_STAGE.values()
+            for lane in ('interactive', 'bulk')
+        }
+
+    def publish(self,
+                routing_key: str,
+                payload: Dict,
+                correlation_id: Optional[str] = None):
+        self.queues[routing_key].append(
+            (json.loads(json.dumps(payload)), correlation_id))
+
+    def drain(self):
+        """Deliver stage tasks until every stage queue is empty"""
+        delivered = True
+        while delivered:
+            delivered = False
+            for queue_name, stage in self._stage_queues.items():
+                while self.queues[queue_name]:
+                    task, _ = self.queues[queue_name].popleft()
+                    run_stage(stage, task, self.publish)
+                    delivered = True
+
+    def process(self, image_path: str, reply_to: str = 'local.reply') -> Dict:
+        """Run one image through every stage and return the reply"""
+        correlation_id = str(uuid.uuid4())
+        start_pipeline(image_path, f"local-{correlation_id}", reply_to,
+                       correlation_id, 'interactive', self.publish)
+        self.drain()
+        for response, reply_correlation_id in self.queues[reply_to]:
+            if reply_correlation_id == correlation_id:
+                self.queues[reply_to].remove(
+                    (response, reply_correlation_id))
+                return response
+        raise RuntimeError(f"No reply for {correlation_id}")
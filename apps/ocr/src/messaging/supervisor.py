@@ -0,0 +1,178 @@
+"""
+Pre-fork worker supervisor for Egyptian ID OCR service
+Loads models once, then forks N OCRConsumer worker processes that share the
+read-only model weights copy-on-write, each with its own RabbitMQ connection
+"""
+import os
+import signal
+import time
+from typing import Dict
+from ..config import (logger, stop_logging, get_openvino_config,
+                      get_ocr_config, CLASS_MODEL_KEY, ID_MODEL_KEY)
+from src.core.ocr_processor import preload_models, start_model_watcher
+from .concurrency import available_cpus
+from .stages import get_stage, STAGE_MODELS
+
+# Seconds a worker must stay up for its exit to count as a normal crash
+# (faster exits back off exponentially before the next restart)
+WORKER_MIN_UPTIME = float(os.getenv('OCR_WORKER_MIN_UPTIME', '10'))
+WORKER_MAX_RESTART_DELAY = float(os.getenv('OCR_WORKER_MAX_RESTART_DELAY',
+                                           '30'))
+# Seconds to wait for workers to finish in-flight messages on shutdown
+SHUTDOWN_TIMEOUT = float(os.getenv('OCR_SHUTDOWN_TIMEOUT', '60'))
+POLL_INTERVAL = 0.5
+
+
+def limit_threads_per_worker(worker_count: int):
+    """
+    Split the CPU between workers unless thread limits are configured
+    Without this every worker sizes its thread pools for the whole machine
+    (not the container's CPU quota)
+    """
+    threads = str(max(1, available_cpus() // worker_count))
+    for model_key in (CLASS_MODEL_KEY, ID_MODEL_KEY):
+        if 'INFERENCE_NUM_THREADS' not in get_openvino_config(model_key):
+            os.environ[f'{model_key}_OV_INFERENCE_NUM_THREADS'] = threads
+    if 'cpu_threads' not in get_ocr_config():
+        os.environ['OCR_CPU_THREADS'] = threads
+    logger.info(f"Thread limit per worker: {threads} (unless configured)")
+
+
+class WorkerSupervisor:
+
+    def __init__(self, worker_count: int):
+        """Initialize supervisor for worker_count consumer processes"""
+        self.worker_count = worker_count
+        # pid -> (worker index, start time)
+        self.workers: Dict[int, tuple] = {}
+        # worker index -> consecutive fast crashes
+        self.crash_counts: Dict[int, int] = {}
+        # worker index -> monotonic time when it may be restarted
+        self.pending_restarts: Dict[int, float] = {}
+        self.shutting_down = False
+        self.shutdown_deadline = None
+
+    def run(self):
+        """Load models, fork workers and supervise them until shutdown"""
+        limit_threads_per_worker(self.worker_count)
+
+        logger.info("Preloading OCR models in supervisor...")
+        preload_models(warmup=False,
+                       compile_openvino=False,
+                       models=STAGE_MODELS.get(get_stage()))
+
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+
+        for index in range(self.worker_count):
+            self._spawn(index)
+        logger.info(f"✓ Supervisor started {self.worker_count} workers")
+
+        self._monitor()
+        logger.info("✓ Supervisor stopped")
+
+    def _spawn(self, index: int):
+        """Fork a worker process"""
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker(index)
+            except BaseException as e:
+                logger.error(f"[worker {index}] Crashed: {e}", exc_info=True)
+                exit_code = 1
+            finally:
+                # os._exit skips atexit, flush queued log records first
+                stop_logging()
+                os._exit(exit_code)
+
+        self.workers[pid] = (index, time.monotonic())
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def _run_worker(self, index: int):
+        """Worker process body: compile, warm up and consume"""
+        from .rabbitmq_consumer import OCRConsumer
+
+        # Workers stop gracefully on SIGTERM; SIGINT is handled by supervisor
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        # OCR weights are inherited; OpenVINO compiles the inherited IR
+        preload_models(models=STAGE_MODELS.get(get_stage()))
+        # Each worker hot-swaps its own models when a new version lands
+        start_model_watcher()
+
+        consumer = OCRConsumer()
+        signal.signal(signal.SIGTERM, lambda signum, frame: consumer.stop())
+        logger.info(f"✓ Worker {index} (pid {os.getpid()}) ready")
+        # run() connects and keeps reconnecting without reloading models
+        consumer.run()
+        logger.info(f"Worker {index} (pid {os.getpid()}) stopped")
+
+    def _handle_shutdown(self, signum, frame):
+        """Forward shutdown to workers; the monitor loop reaps them"""
+        if self.shutting_down:
+            return
+        logger.info(f"Received signal {signum}, stopping workers...")
+        self.shutting_down = True
+        self.shutdown_deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        self.pending_restarts.clear()
+        self._signal_workers(signal.SIGTERM)
+
+    def _signal_workers(self, signum: int):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _monitor(self):
+        """Reap exited workers and restart them until shutdown completes"""
+        while self.workers or self.pending_restarts:
+            self._reap()
+
+            now = time.monotonic()
+            for index, restart_at in list(self.pending_restarts.items()):
+                if restart_at <= now:
+                    del self.pending_restarts[index]
+                    self._spawn(index)
+
+            if (self.shutting_down and self.workers
+                    and now > self.shutdown_deadline):
+                logger.warning("Shutdown timeout, killing remaining workers")
+                self._signal_workers(signal.SIGKILL)
+                self.shutdown_deadline = float('inf')
+
+            time.sleep(POLL_INTERVAL)
+
+    def _reap(self):
+        """Collect exited workers and schedule restarts for crashed ones"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+
+            index, started_at = self.workers.pop(pid, (None, None))
+            if index is None:
+                continue
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            if self.shutting_down:
+                logger.info(f"Worker {index} (pid {pid}) exited ({exit_code})")
+                continue
+
+            uptime = time.monotonic() - started_at
+            if uptime < WORKER_MIN_UPTIME:
+                self.crash_counts[index] = self.crash_counts.get(index, 0) + 1
+            else:
+                self.crash_counts[index] = 0
+            delay = min(WORKER_MAX_RESTART_DELAY,
+                        2**self.crash_counts[index] - 1)
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited ({exit_code}) after "
+                f"{uptime:.0f} s, restarting in {delay:.0f} s")
+            self.pending_restarts[index] = time.monotonic() + delay
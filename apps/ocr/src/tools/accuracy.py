@@ -0,0 +1,251 @@
+"""
+Accuracy and latency harness for Egyptian ID OCR precision modes
+Runs the full process_id_card pipeline over a labeled local image set once
+per precision mode (fp32/fp16/bf16/int8) and reports field-level accuracy
+(names, location, 14-digit ID) and latency, accepting or rejecting each mode
+against the first (baseline) mode. The precision each model actually runs at
+is read back from the compiled model; a mode that is not in effect (e.g. a
+hint the CPU ignores) is rejected.
+
+The image directory holds a labels.jsonl file with one object per image:
+    {"image": "card_001.jpg", "first_name": "...", "second_name": "...",
+     "location": "...", "id_number": "29801011234567"}
+"""
+import os
+import json
+import time
+import uuid
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from ..config import (logger, stop_logging, PRECISION_MODES,
+                      CLASS_MODEL_KEY, ID_MODEL_KEY)
+from ..core.ocr_processor import (MODEL_REGISTRY, CLASS_MODEL_NAME,
+                                  ID_MODEL_NAME, CLASS_MODEL_XML, ID_MODEL_XML,
+                                  int8_model_path, process_id_card)
+
+TEXT_FIELDS = ('first_name', 'second_name', 'location')
+ID_FIELD = 'id_number'
+# INFERENCE_PRECISION_HINT a compiled model must report in each mode
+EXPECTED_PRECISION = {'fp32': 'f32', 'fp16': 'f16', 'bf16': 'bf16'}
+
+
+def normalize(text: str) -> str:
+    return ' '.join(str(text or '').split())
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance between two strings"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def load_labels(image_dir: str) -> List[Dict]:
+    labels_path = os.path.join(image_dir, 'labels.jsonl')
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        labels = [json.loads(line) for line in f if line.strip()]
+    if not labels:
+        raise ValueError(f"No labels in {labels_path}")
+    return labels
+
+
+def set_precision_mode(mode: str):
+    """Switch the class and digit models to a precision mode and reload"""
+    if mode == 'int8':
+        # The loader falls back to FP32 silently, which would skew the report
+        for model_xml in (CLASS_MODEL_XML, ID_MODEL_XML):
+            if not os.path.exists(int8_model_path(model_xml)):
+                raise FileNotFoundError(
+                    f"{int8_model_path(model_xml)} missing, run "
+                    "run_quantize.py first")
+    for model_key in (CLASS_MODEL_KEY, ID_MODEL_KEY):
+        os.environ[f'{model_key}_PRECISION'] = mode
+    for name in (CLASS_MODEL_NAME, ID_MODEL_NAME):
+        if not MODEL_REGISTRY.reload(name):
+            raise RuntimeError(f"Failed to load '{name}' in {mode} mode")
+
+
+def effective_precision() -> Dict[str, Dict[str, str]]:
+    """
+    Precision the class and digit models actually run at, read back from
+    the compiled models (the CPU may ignore an unsupported hint)
+    """
+    effective = {}
+    for name in (CLASS_MODEL_NAME, ID_MODEL_NAME):
+        model = MODEL_REGISTRY.get(name)
+        hint = model.compiled_model.get_property('INFERENCE_PRECISION_HINT')
+        get_type_name = getattr(hint, 'get_type_name', None)
+        effective[name] = {
+            'ir': model.name,
+            'precision': get_type_name() if get_type_name else str(hint)
+        }
+    return effective
+
+
+def precision_mismatches(mode: str, effective: Dict) -> List[str]:
+    """Reasons the models do not run in the requested mode"""
+    reasons = []
+    for name, info in effective.items():
+        if mode == 'int8':
+            if not os.path.splitext(info['ir'])[0].endswith('_int8'):
+                reasons.append(f"{name} model loaded {info['ir']}, "
+                               "not the int8 IR")
+        elif info['precision'] != EXPECTED_PRECISION[mode]:
+            reasons.append(f"{name} model runs at {info['precision']}, "
+                           f"not {EXPECTED_PRECISION[mode]}")
+    return reasons
+
+
+def evaluate(image_dir: str, labels: List[Dict]) -> Dict:
+    """Run the pipeline over every labeled image and score the fields"""
+    exact = {field: 0 for field in TEXT_FIELDS + (ID_FIELD, )}
+    edits = {field: 0 for field in TEXT_FIELDS}
+    chars = {field: 0 for field in TEXT_FIELDS}
+    digits_correct = digits_total = errors = 0
+    latencies = []
+
+    for label in labels:
+        start = time.perf_counter()
+        result = process_id_card(os.path.join(image_dir, label['image']),
+                                 f"accuracy-{uuid.uuid4()}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if 'error' in result:
+            errors += 1
+            result = {}
+
+        for field in TEXT_FIELDS:
+            expected = normalize(label.get(field))
+            predicted = normalize(result.get(field))
+            exact[field] += predicted == expected
+            edits[field] += levenshtein(predicted, expected)
+            chars[field] += max(len(expected), 1)
+
+        expected_id = normalize(label.get(ID_FIELD))
+        predicted_id = normalize(result.get(ID_FIELD))
+        exact[ID_FIELD] += predicted_id == expected_id
+        digits_correct += sum(p == e
+                              for p, e in zip(predicted_id, expected_id))
+        digits_total += len(expected_id)
+
+    count = len(labels)
+    return {
+        'images': count,
+        'errors': errors,
+        'exact_match': {
+            field: round(hits / count, 4)
+            for field, hits in exact.items()
+        },
+        'cer': {
+            field: round(edits[field] / chars[field], 4)
+            for field in TEXT_FIELDS
+        },
+        'id_digit_accuracy': round(digits_correct / max(digits_total, 1), 4),
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies, 50)), 1),
+            'p95': round(float(np.percentile(latencies, 95)), 1),
+            'mean': round(float(np.mean(latencies)), 1)
+        }
+    }
+
+
+def compare(baseline: Dict, candidate: Dict, max_drop: float) -> List[str]:
+    """Reasons a mode is rejected against the baseline (empty = accepted)"""
+    reasons = []
+    for field, accuracy in candidate['exact_match'].items():
+        drop = baseline['exact_match'][field] - accuracy
+        if drop > max_drop:
+            reasons.append(f"{field} exact match -{drop:.2%}")
+    drop = baseline['id_digit_accuracy'] - candidate['id_digit_accuracy']
+    if drop > max_drop:
+        reasons.append(f"ID digit accuracy -{drop:.2%}")
+    return reasons
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Field accuracy and latency per precision mode')
+    parser.add_argument('image_dir',
+                        help='Labeled image directory (with labels.jsonl)')
+    parser.add_argument('--modes',
+                        default=','.join(PRECISION_MODES),
+                        help='Comma-separated modes, the first is the '
+                        'baseline')
+    parser.add_argument('--max-accuracy-drop',
+                        type=float,
+                        default=0.01,
+                        help='Largest accepted drop of any field accuracy '
+                        'versus the baseline (fraction)')
+    parser.add_argument('--output',
+                        default='accuracy_report.json',
+                        help='JSON report file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the accuracy harness"""
+    args = parse_args(argv)
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = set(modes) - set(PRECISION_MODES)
+    if unknown:
+        raise SystemExit(f"Unknown precision modes: {', '.join(unknown)}")
+
+    labels = load_labels(args.image_dir)
+    logger.info(f"Evaluating {len(labels)} labeled images in modes: "
+                f"{', '.join(modes)}")
+
+    report = {'baseline': modes[0], 'modes': {}}
+    for mode in modes:
+        try:
+            set_precision_mode(mode)
+        except (RuntimeError, FileNotFoundError) as e:
+            logger.error(f"Skipping {mode}: {e}")
+            report['modes'][mode] = {'error': str(e), 'accepted': False}
+            continue
+        # One untimed pass so compilation/caches do not skew latency
+        process_id_card(os.path.join(args.image_dir, labels[0]['image']),
+                        f"accuracy-warmup-{uuid.uuid4()}")
+        effective = effective_precision()
+        mismatches = precision_mismatches(mode, effective)
+        if mismatches:
+            logger.warning(f"{mode} not in effect: {'; '.join(mismatches)}")
+        result = evaluate(args.image_dir, labels)
+        result.update(effective_precision=effective,
+                      precision_mismatches=mismatches)
+        report['modes'][mode] = result
+
+    baseline = report['modes'][modes[0]]
+    for mode, result in report['modes'].items():
+        if 'error' in result or 'error' in baseline:
+            continue
+        # A mode that did not run at its precision proves nothing about it
+        reasons = (result['precision_mismatches'] +
+                   compare(baseline, result, args.max_accuracy_drop))
+        result['accepted'] = not reasons
+        result['rejected_because'] = reasons
+        result['speedup_p50'] = round(
+            baseline['latency_ms']['p50'] / result['latency_ms']['p50'], 2)
+
+        logger.info(
+            f"{mode:>5}: ID {result['exact_match'][ID_FIELD]:.2%} "
+            f"(digits {result['id_digit_accuracy']:.2%}), "
+            f"names {result['exact_match']['first_name']:.2%}/"
+            f"{result['exact_match']['second_name']:.2%}, "
+            f"location {result['exact_match']['location']:.2%}, "
+            f"p50 {result['latency_ms']['p50']:.0f} ms "
+            f"(x{result['speedup_p50']}) -> "
+            f"{'ACCEPT' if result['accepted'] else 'REJECT: ' + '; '.join(reasons)}"
+        )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info(f"Report written to {args.output}")
+    stop_logging()
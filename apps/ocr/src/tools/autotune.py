@@ -0,0 +1,267 @@
+"""
+Inference autotuning for Egyptian ID OCR service
+Sweeps OpenVINO performance settings (and PaddleOCR threads) on the local
+machine with the bundled models and writes the best config to the file read
+by src.config.inference (OV_CONFIG_FILE). Precision is fixed at f32: reduced
+precision is chosen per model with <MODEL_KEY>_PRECISION after the accuracy
+check (run_accuracy.py), not on speed alone.
+"""
+import os
+import json
+import time
+import argparse
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from ..config import logger, CLASS_MODEL_KEY, ID_MODEL_KEY, OCR_KEY
+from ..config.inference import resolve_config_file, load_config_file
+from ..messaging.concurrency import available_cpus
+from ..core.ocr_processor import (CLASS_MODEL_XML, CLASS_MODEL_METADATA,
+                                  ID_MODEL_XML, ID_MODEL_METADATA,
+                                  load_metadata, preprocess_image,
+                                  warmup_ocr_model)
+
+MODELS = {
+    CLASS_MODEL_KEY: (CLASS_MODEL_XML, CLASS_MODEL_METADATA),
+    ID_MODEL_KEY: (ID_MODEL_XML, ID_MODEL_METADATA),
+}
+
+
+def build_candidates(target: str) -> List[Dict[str, str]]:
+    """
+    Build the grid of OpenVINO configs to try on this CPU
+
+    LATENCY hint candidates vary threads/pinning, THROUGHPUT hint candidates
+    vary the number of streams, sized for the CPUs this container may use.
+    Every candidate pins f32 precision, so a CPU defaulting to bf16 is not
+    measured (and written) at an unchecked precision.
+    """
+    cpu_count = available_cpus()
+
+    thread_options = sorted({cpu_count, max(1, cpu_count // 2), 1})
+    stream_options = sorted(
+        {1, 2, max(1, cpu_count // 4),
+         max(1, cpu_count // 2)})
+
+    candidates = []
+    for threads, pinning in itertools.product(thread_options, ['YES', 'NO']):
+        candidates.append({
+            'PERFORMANCE_HINT': 'LATENCY',
+            'INFERENCE_NUM_THREADS': str(threads),
+            'ENABLE_CPU_PINNING': pinning,
+            'INFERENCE_PRECISION_HINT': 'f32',
+        })
+
+    if target == 'throughput':
+        for streams in stream_options:
+            candidates.append({
+                'PERFORMANCE_HINT': 'THROUGHPUT',
+                'NUM_STREAMS': str(streams),
+                'INFERENCE_PRECISION_HINT': 'f32',
+            })
+
+    return candidates
+
+
+def measure_config(core, model_path: str, input_tensor: np.ndarray,
+                   config: Dict[str, str], iterations: int) -> Dict:
+    """
+    Compile a model with a config and measure latency and throughput
+
+    Returns:
+        dict: p50/p95 latency (ms), throughput (inferences/s), infer requests
+    """
+    from openvino import AsyncInferQueue
+
+    compiled = core.compile_model(model_path, 'CPU', config)
+
+    # Latency: synchronous inference on a single request
+    request = compiled.create_infer_request()
+    request.infer({0: input_tensor})  # warm-up
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        request.infer({0: input_tensor})
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # Throughput: keep the optimal number of infer requests in flight
+    jobs = compiled.get_property('OPTIMAL_NUMBER_OF_INFER_REQUESTS')
+    queue = AsyncInferQueue(compiled, jobs)
+    start = time.perf_counter()
+    for _ in range(iterations * jobs):
+        queue.start_async({0: input_tensor})
+    queue.wait_all()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'throughput': iterations * jobs / elapsed,
+        'infer_requests': int(jobs),
+    }
+
+
+def select_best(results: List[Dict], target: str,
+                latency_budget_ms: Optional[float]) -> Optional[Dict]:
+    """Pick the best measured config for the target"""
+    if target == 'latency':
+        return min(results, key=lambda r: r['metrics']['p95_ms'], default=None)
+
+    eligible = [
+        r for r in results if latency_budget_ms is None
+        or r['metrics']['p95_ms'] <= latency_budget_ms
+    ]
+    if not eligible:
+        logger.warning(
+            f"No config meets the {latency_budget_ms} ms p95 budget, "
+            "falling back to the lowest-latency config")
+        return select_best(results, 'latency', None)
+    return max(eligible, key=lambda r: r['metrics']['throughput'])
+
+
+def tune_model(core, model_key: str, target: str, iterations: int,
+               latency_budget_ms: Optional[float],
+               sample_image: Optional[np.ndarray]) -> Optional[Dict]:
+    """Sweep all candidate configs for one model"""
+    model_path, metadata_path = MODELS[model_key]
+    imgsz = tuple(load_metadata(metadata_path).get('imgsz', [640, 640]))
+    image = sample_image if sample_image is not None else np.full(
+        (imgsz[0], imgsz[1], 3), 114, dtype=np.uint8)
+    input_tensor, _, _ = preprocess_image(image, imgsz)
+
+    results = []
+    candidates = build_candidates(target)
+    logger.info(f"[{model_key}] Trying {len(candidates)} configs...")
+    for config in candidates:
+        try:
+            metrics = measure_config(core, model_path, input_tensor, config,
+                                     iterations)
+        except Exception as e:
+            logger.warning(f"[{model_key}] Skipping {config}: {e}")
+            continue
+        logger.info(
+            f"[{model_key}] {config} -> p50 {metrics['p50_ms']:.1f} ms, "
+            f"p95 {metrics['p95_ms']:.1f} ms, {metrics['throughput']:.1f} inf/s"
+        )
+        results.append({'config': config, 'metrics': metrics})
+
+    best = select_best(results, target, latency_budget_ms)
+    if best:
+        logger.info(f"[{model_key}] Best config: {best['config']}")
+    return best
+
+
+def tune_ocr(thread_options: List[int], iterations: int) -> Optional[Dict]:
+    """Sweep PaddleOCR cpu_threads on a synthetic text line"""
+    from paddleocr import PaddleOCR
+
+    line = np.full((48, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(line, 'autotune 0123', (10, 34), cv2.FONT_HERSHEY_SIMPLEX,
+                1.0, (0, 0, 0), 2)
+
+    results = []
+    for threads in thread_options:
+        ocr = PaddleOCR(lang='ar',
+                        use_doc_orientation_classify=False,
+                        use_doc_unwarping=False,
+                        use_textline_orientation=False,
+                        cpu_threads=threads)
+        warmup_ocr_model(ocr)
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            ocr.predict(line)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p95 = float(np.percentile(latencies, 95))
+        logger.info(f"[{OCR_KEY}] cpu_threads={threads} -> p95 {p95:.1f} ms")
+        results.append({'cpu_threads': threads, 'p95_ms': p95})
+        del ocr
+
+    return min(results, key=lambda r: r['p95_ms'], default=None)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Autotune OpenVINO and PaddleOCR settings on this machine')
+    parser.add_argument('--target',
+                        choices=['latency', 'throughput'],
+                        default='latency',
+                        help='Optimize p95 latency or throughput')
+    parser.add_argument(
+        '--latency-budget-ms',
+        type=float,
+        default=None,
+        help='Throughput target only: maximum acceptable p95 latency')
+    parser.add_argument('--iterations',
+                        type=int,
+                        default=20,
+                        help='Measured inferences per config')
+    parser.add_argument('--models',
+                        default=f'{CLASS_MODEL_KEY},{ID_MODEL_KEY}',
+                        help='Comma-separated model keys to tune')
+    parser.add_argument(
+        '--ocr-threads',
+        default='',
+        help='Comma-separated PaddleOCR cpu_threads values to try '
+        '(empty to skip OCR tuning)')
+    parser.add_argument('--image',
+                        default=None,
+                        help='Sample ID photo to use instead of a blank input')
+    parser.add_argument('--output',
+                        default=None,
+                        help='Output file (defaults to OV_CONFIG_FILE)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the autotune command"""
+    from openvino import Core
+
+    args = parse_args(argv)
+    output_path = args.output or str(resolve_config_file())
+
+    sample_image = None
+    if args.image:
+        sample_image = cv2.imread(args.image)
+        if sample_image is None:
+            raise ValueError(f"Failed to load image: {args.image}")
+
+    # Start from the existing file so untuned sections are preserved
+    tuned = load_config_file() if not args.output else {}
+    report = {}
+
+    core = Core()
+    for model_key in filter(None, args.models.split(',')):
+        if model_key not in MODELS:
+            raise ValueError(f"Unknown model key: {model_key}")
+        best = tune_model(core, model_key, args.target, args.iterations,
+                          args.latency_budget_ms, sample_image)
+        if best:
+            tuned[model_key] = best['config']
+            report[model_key] = best['metrics']
+
+    thread_options = [int(t) for t in args.ocr_threads.split(',') if t]
+    if thread_options:
+        best_ocr = tune_ocr(thread_options, args.iterations)
+        if best_ocr:
+            tuned.setdefault(OCR_KEY, {})['cpu_threads'] = best_ocr[
+                'cpu_threads']
+            report[OCR_KEY] = {'p95_ms': best_ocr['p95_ms']}
+
+    tuned['_meta'] = {
+        'target': args.target,
+        'latency_budget_ms': args.latency_budget_ms,
+        'cpu_count': available_cpus(),
+        'cpu': core.get_property('CPU', 'FULL_DEVICE_NAME'),
+        'tuned_at': datetime.now().isoformat(timespec='seconds'),
+        'metrics': report,
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(tuned, f, indent=2)
+    logger.info(f"✓ Tuned config written to {output_path}")
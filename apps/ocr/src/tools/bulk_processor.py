@@ -0,0 +1,251 @@
+"""
+Offline bulk processing for Egyptian ID OCR service
+Streams a directory or archive (.zip/.tar[.gz]) of archived ID scans through
+the process_id_card pipeline on a process pool, writing results to JSONL.
+The output file doubles as the checkpoint: re-running skips finished images.
+"""
+import os
+import json
+import time
+import uuid
+import signal
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import multiprocessing
+import multiprocessing.util
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+import numpy as np
+
+from ..config import (logger, stop_logging, get_openvino_config,
+                      CLASS_MODEL_KEY, ID_MODEL_KEY)
+from ..core.ocr_processor import (preload_models, process_id_card,
+                                  process_id_sheet)
+from ..messaging.stages import ocr_response, sheet_response
+from ..messaging.concurrency import available_cpus
+from ..messaging.supervisor import limit_threads_per_worker
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff'}
+
+# (key, source): source is a file path for directories, raw bytes for archives
+Item = Tuple[str, Union[str, bytes]]
+
+
+def is_image(name: str) -> bool:
+    return Path(name).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def iter_items(input_path: str) -> Iterator[Item]:
+    """Yield images from a directory or archive in a stable order"""
+    path = Path(input_path)
+    if path.is_dir():
+        for file_path in sorted(path.rglob('*')):
+            if file_path.is_file() and is_image(file_path.name):
+                yield str(file_path.relative_to(path)), str(file_path)
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in sorted(archive.infolist(), key=lambda i: i.filename):
+                if not info.is_dir() and is_image(info.filename):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(path):
+        # Streaming mode: members are read in archive order, never seeked
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and is_image(member.name):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"Unsupported input (not a directory or archive): "
+                         f"{input_path}")
+
+
+def load_checkpoint(output_path: str, retry_errors: bool) -> Set[str]:
+    """Keys already present in the output file (optionally only successes)"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial last line from an interrupted run
+                continue
+            if retry_errors and record.get('status') != 'ok':
+                continue
+            done.add(record['key'])
+    return done
+
+
+def iter_batches(items: Iterator[Item], done: Set[str],
+                 batch_size: int) -> Iterator[List[Item]]:
+    """Group pending items into batches, skipping checkpointed keys"""
+    batch = []
+    for key, source in items:
+        if key in done:
+            continue
+        batch.append((key, source))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(nice: int):
+    """Pool initializer: lower priority, compile and warm up models"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Pool workers exit without running atexit, flush queued log records
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+    if nice:
+        os.nice(nice)
+    preload_models()
+
+
+def process_batch(batch: List[Item], multi_card: bool = False) -> List[Dict]:
+    """
+    Run the ID card pipeline over one batch of images (in a worker)
+    With multi_card every card on each image is processed (scanned sheets)
+    """
+    records = []
+    temp_base = os.getenv('TEMP_DIR') or None
+    if temp_base:
+        os.makedirs(temp_base, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=temp_base) as temp_dir:
+        for key, source in batch:
+            start = time.perf_counter()
+            if isinstance(source, bytes):
+                image_path = os.path.join(temp_dir,
+                                          f"{uuid.uuid4()}{Path(key).suffix}")
+                with open(image_path, 'wb') as f:
+                    f.write(source)
+            else:
+                image_path = source
+
+            process = process_id_sheet if multi_card else process_id_card
+            result = process(image_path, f"bulk-{uuid.uuid4()}")
+            record = {
+                'key': key,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+            }
+            if 'error' in result:
+                record.update(status='error', error=result['error'])
+            else:
+                record.update(status='ok',
+                              result=sheet_response(result)
+                              if multi_card else ocr_response(result))
+            records.append(record)
+    return records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Bulk-process archived Egyptian ID scans to JSONL')
+    parser.add_argument('input',
+                        help='Directory or .zip/.tar[.gz] archive of images')
+    parser.add_argument('--output',
+                        default='bulk_results.jsonl',
+                        help='JSONL output file (also the resume checkpoint)')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=max(1, available_cpus() // 2),
+                        help='Worker processes')
+    parser.add_argument('--batch-size',
+                        type=int,
+                        default=8,
+                        help='Images per worker task')
+    parser.add_argument('--retry-errors',
+                        action='store_true',
+                        help='Reprocess images that failed in a previous run '
+                        '(new records are appended and supersede old ones)')
+    parser.add_argument('--multi-card',
+                        action='store_true',
+                        help='Images are scanned sheets: process every card '
+                        'and write a "cards" list per image')
+    parser.add_argument('--nice',
+                        type=int,
+                        default=10,
+                        help='Niceness for workers (yield CPU to live pods)')
+    parser.add_argument('--report-every',
+                        type=int,
+                        default=100,
+                        help='Log throughput every N images')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the bulk processing command"""
+    args = parse_args(argv)
+
+    done = load_checkpoint(args.output, args.retry_errors)
+    if done:
+        logger.info(f"Resuming: {len(done)} images already in {args.output}")
+
+    # Bulk runs favour throughput; explicit env/tuned settings still win
+    for model_key in (CLASS_MODEL_KEY, ID_MODEL_KEY):
+        if 'PERFORMANCE_HINT' not in get_openvino_config(model_key):
+            os.environ[f'{model_key}_OV_PERFORMANCE_HINT'] = 'THROUGHPUT'
+    limit_threads_per_worker(args.workers)
+
+    # Load once before forking the pool, workers share weights copy-on-write
+    preload_models(warmup=False, compile_openvino=False)
+
+    batches = iter_batches(iter_items(args.input), done, args.batch_size)
+    counts = {'ok': 0, 'error': 0}
+    durations = []
+    start = time.perf_counter()
+    next_report = args.report_every
+
+    def write_records(records, output):
+        nonlocal next_report
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            counts[record['status']] += 1
+            durations.append(record['duration_ms'])
+        # Flush per batch so an interrupted run resumes from here
+        output.flush()
+
+        processed = counts['ok'] + counts['error']
+        if processed >= next_report:
+            elapsed = time.perf_counter() - start
+            logger.info(f"Processed {processed} images "
+                        f"({processed / elapsed:.2f} img/s)")
+            next_report += args.report_every
+
+    # Bounded submission: Pool.imap would drain the whole archive into
+    # memory, so only a couple of batches per worker are kept in flight
+    max_in_flight = args.workers * 2
+    context = multiprocessing.get_context('fork')
+    with context.Pool(args.workers, initializer=_init_worker,
+                      initargs=(args.nice, )) as pool, \
+            open(args.output, 'a', encoding='utf-8') as output:
+        pending = deque()
+        try:
+            for batch in batches:
+                pending.append(
+                    pool.apply_async(process_batch,
+                                     (batch, args.multi_card)))
+                while len(pending) >= max_in_flight:
+                    write_records(pending.popleft().get(), output)
+            while pending:
+                write_records(pending.popleft().get(), output)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, progress saved to checkpoint")
+            pool.terminate()
+
+    elapsed = time.perf_counter() - start
+    processed = counts['ok'] + counts['error']
+    logger.info("=" * 60)
+    logger.info(f"Bulk processing finished in {elapsed:.1f} s")
+    logger.info(f"Processed: {processed} (ok {counts['ok']}, "
+                f"errors {counts['error']}), skipped: {len(done)}")
+    if processed:
+        logger.info(
+            f"Throughput: {processed / elapsed:.2f} img/s, per-image latency "
+            f"p50 {np.percentile(durations, 50):.0f} ms, "
+            f"p95 {np.percentile(durations, 95):.0f} ms")
+    logger.info("=" * 60)
+    stop_logging()
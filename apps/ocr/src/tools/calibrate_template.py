@@ -0,0 +1,118 @@
+"""
+ID card template calibration for the template-geometry fast path
+Runs the class model over well-aligned sample cards, maps each detected
+field onto the rectified card and writes the median field regions to the
+template file (TEMPLATE_FILE, default models/id_template.json). With the
+default TEMPLATE_FAST_PATH=auto the fast path is only used once this file
+exists.
+"""
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..config import logger
+from ..core import card_template
+from ..core.ocr_processor import (CONFIDENCE_THRESHOLD,
+                                  TEMPLATE_MIN_CONFIDENCE, get_class_model)
+from .bulk_processor import IMAGE_EXTENSIONS
+
+
+def field_regions(image: np.ndarray, model) -> dict:
+    """Detected field boxes as fractions of the rectified card"""
+    detections = model.predict(image, conf=CONFIDENCE_THRESHOLD)
+    names = {det['class']: model.names.get(det['class']) for det in detections}
+    cards = [d for d in detections if names[d['class']] == 'egyptian-id']
+    if not cards:
+        return {}
+    card_det = max(cards, key=lambda det: det['confidence'])
+    if card_det['confidence'] < TEMPLATE_MIN_CONFIDENCE:
+        return {}
+    card, homography, _ = card_template.rectify_card(image, card_det['box'])
+    if card is None:
+        return {}
+
+    card_w, card_h = card_template.CARD_SIZE
+    regions = {}
+    for det in sorted(detections, key=lambda det: det['confidence']):
+        name = names[det['class']]
+        if name not in card_template.DEFAULT_REGIONS:
+            continue
+        x1, y1, x2, y2 = det['box']
+        corners = np.array([[[x1, y1], [x2, y1], [x2, y2], [x1, y2]]],
+                           dtype=np.float32)
+        mapped = cv2.perspectiveTransform(corners, homography)[0]
+        regions[name] = [
+            mapped[:, 0].min() / card_w, mapped[:, 1].min() / card_h,
+            mapped[:, 0].max() / card_w, mapped[:, 1].max() / card_h
+        ]
+    return regions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Calibrate the ID card template from sample scans')
+    parser.add_argument('image_dir',
+                        help='Directory of well-aligned ID card fronts')
+    parser.add_argument('--padding',
+                        type=float,
+                        default=0.01,
+                        help='Grow each region by this fraction of the card')
+    parser.add_argument('--min-samples',
+                        type=int,
+                        default=20,
+                        help='Minimum detections per field')
+    parser.add_argument('--output',
+                        default=None,
+                        help='Template file (default: TEMPLATE_FILE)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the template calibration command"""
+    args = parse_args(argv)
+    model = get_class_model()
+
+    samples = defaultdict(list)
+    images = 0
+    for path in sorted(Path(args.image_dir).rglob('*')):
+        if path.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        images += 1
+        for name, region in field_regions(image, model).items():
+            samples[name].append(region)
+
+    regions = {}
+    for name in card_template.DEFAULT_REGIONS:
+        if len(samples[name]) < args.min_samples:
+            logger.warning(f"Only {len(samples[name])} samples of '{name}', "
+                           "keeping the default region")
+            continue
+        x1, y1, x2, y2 = np.median(np.array(samples[name]), axis=0)
+        regions[name] = [
+            round(float(max(0.0, x1 - args.padding)), 4),
+            round(float(max(0.0, y1 - args.padding)), 4),
+            round(float(min(1.0, x2 + args.padding)), 4),
+            round(float(min(1.0, y2 + args.padding)), 4)
+        ]
+        logger.info(f"{name}: {regions[name]} "
+                    f"({len(samples[name])} samples)")
+
+    output = Path(args.output or card_template.resolve_template_file())
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'card_size': list(card_template.CARD_SIZE),
+            'images': images,
+            'regions': regions
+        },
+                  f,
+                  indent=2,
+                  ensure_ascii=False)
+    logger.info(f"✓ Template written to {output} ({images} images)")
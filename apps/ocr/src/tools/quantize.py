@@ -0,0 +1,128 @@
+"""
+INT8 post-training quantization for the Egyptian ID OpenVINO models
+Calibrates on a local directory of ID photos with NNCF and writes
+<model>_int8.xml next to each FP32 model, loaded when
+<MODEL_KEY>_PRECISION=int8
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from ..config import logger, CLASS_MODEL_KEY, ID_MODEL_KEY
+from ..core.ocr_processor import (CLASS_MODEL_XML, CLASS_MODEL_METADATA,
+                                  ID_MODEL_XML, ID_MODEL_METADATA,
+                                  CONFIDENCE_THRESHOLD, OpenVINOYOLOModel,
+                                  get_openvino_core, int8_model_path,
+                                  load_metadata, preprocess_image)
+from .bulk_processor import IMAGE_EXTENSIONS
+
+# YOLO detection head ops kept in FP32 (box decoding is precision sensitive)
+IGNORED_TYPES = ['Multiply', 'Subtract', 'Sigmoid']
+
+
+def load_calibration_images(calibration_dir: str, limit: int) -> List:
+    """Load up to limit BGR images from a directory (recursively)"""
+    images = []
+    for path in sorted(Path(calibration_dir).rglob('*')):
+        if path.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        image = cv2.imread(str(path))
+        if image is None:
+            logger.warning(f"Skipping unreadable image: {path}")
+            continue
+        images.append(image)
+        if len(images) >= limit:
+            break
+    if not images:
+        raise ValueError(f"No calibration images found in {calibration_dir}")
+    return images
+
+
+def crop_cards(images: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Crop the egyptian-id box with the FP32 class model, so the digit model
+    is calibrated on the same inputs it sees in production
+    """
+    class_model = OpenVINOYOLOModel(CLASS_MODEL_XML, CLASS_MODEL_METADATA)
+    crops = []
+    for image in images:
+        detections = class_model.predict(image, conf=CONFIDENCE_THRESHOLD)
+        cards = [
+            d for d in detections
+            if class_model.names.get(d['class']) == 'egyptian-id'
+        ]
+        if not cards:
+            continue
+        x1, y1, x2, y2 = map(int, max(cards,
+                                      key=lambda d: d['confidence'])['box'])
+        if x2 > x1 and y2 > y1:
+            crops.append(image[y1:y2, x1:x2])
+    logger.info(f"Cropped {len(crops)}/{len(images)} cards for calibration")
+    return crops
+
+
+def quantize_model(model_xml: str, metadata_path: str,
+                   images: List[np.ndarray], subset_size: int) -> str:
+    """Quantize one model to INT8 and save it next to the FP32 IR"""
+    try:
+        import nncf
+    except ImportError as e:
+        raise ImportError(
+            "INT8 quantization needs NNCF: pip install nncf") from e
+    import openvino as ov
+
+    imgsz = tuple(load_metadata(metadata_path).get('imgsz', [640, 640]))
+
+    def transform(image):
+        input_tensor, _, _ = preprocess_image(image, imgsz)
+        return input_tensor
+
+    model = get_openvino_core().read_model(model_xml)
+    quantized = nncf.quantize(
+        model,
+        nncf.Dataset(images, transform),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=min(subset_size, len(images)),
+        ignored_scope=nncf.IgnoredScope(types=IGNORED_TYPES))
+
+    output_xml = int8_model_path(model_xml)
+    ov.save_model(quantized, output_xml, compress_to_fp16=False)
+    logger.info(f"✓ INT8 model written to {output_xml}")
+    return output_xml
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='INT8 post-training quantization of the OCR models')
+    parser.add_argument('calibration_dir',
+                        help='Directory of representative ID photos')
+    parser.add_argument('--models',
+                        default=f'{CLASS_MODEL_KEY},{ID_MODEL_KEY}',
+                        help='Comma-separated model keys to quantize')
+    parser.add_argument('--limit',
+                        type=int,
+                        default=300,
+                        help='Maximum calibration images to load')
+    parser.add_argument('--subset-size',
+                        type=int,
+                        default=300,
+                        help='Calibration samples used by NNCF')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point for the quantize command"""
+    args = parse_args(argv)
+    model_keys = [key for key in args.models.split(',') if key]
+    images = load_calibration_images(args.calibration_dir, args.limit)
+    logger.info(f"Loaded {len(images)} calibration images")
+
+    if CLASS_MODEL_KEY in model_keys:
+        quantize_model(CLASS_MODEL_XML, CLASS_MODEL_METADATA, images,
+                       args.subset_size)
+    if ID_MODEL_KEY in model_keys:
+        quantize_model(ID_MODEL_XML, ID_MODEL_METADATA, crop_cards(images),
+                       args.subset_size)
@@ -0,0 +1,8 @@
+"""Test setup: import src from the ocr/ root and log to a temp directory"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(),
+                                              'ocr-test-logs'))
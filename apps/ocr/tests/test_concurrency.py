@@ -0,0 +1,79 @@
+"""
+Adaptive concurrency with priority lanes
+The consumer runs without a broker: deliveries respect each lane's prefetch
+(its capacity) and submitted work completes when the test says so.
+"""
+from collections import deque
+
+import pytest
+
+from src.messaging.concurrency import AIMDConcurrencyLimit
+from src.messaging.rabbitmq_consumer import OCRConsumer
+
+
+class ManualExecutor:
+    """Executor stand-in: submitted calls run when complete() is called"""
+
+    def __init__(self):
+        self.submitted = deque()
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def complete(self):
+        fn, args = self.submitted.popleft()
+        fn(*args)
+
+
+@pytest.fixture
+def consumer(monkeypatch, tmp_path):
+    monkeypatch.setenv('RABBIT_MQ_OCR_BULK_QUEUE', 'ocr.bulk')
+    monkeypatch.setenv('OCR_BULK_MAX_SHARE', '0.5')
+    monkeypatch.setenv('TEMP_DIR', str(tmp_path))
+    consumer = OCRConsumer()
+    consumer.concurrency = AIMDConcurrencyLimit(initial=2,
+                                                min_limit=2,
+                                                max_limit=8,
+                                                target_latency_ms=1000)
+    # Idle CPU: only saturation and latency drive the limit
+    monkeypatch.setattr(consumer.concurrency, '_measure_cpu', lambda: 0.1)
+    consumer.executor = ManualExecutor()
+    consumer._update_prefetch = lambda limit: None
+    consumer._handle_message = lambda *args: 'ok'
+    return consumer
+
+
+def deliver(consumer, lane, backlog):
+    """Deliver from the broker backlog up to the lane's prefetch"""
+    while backlog and (len(lane.pending) + lane.running <
+                       lane.capacity(consumer.concurrency.limit)):
+        backlog.popleft()
+        consumer.process_message(None, None, None, b'{}', lane)
+
+
+def test_bulk_only_load_grows_the_limit(consumer):
+    bulk = consumer.lanes[1]
+    backlog = deque(range(200))
+    peak_running = 0
+    deliver(consumer, bulk, backlog)
+    while consumer.executor.submitted:
+        peak_running = max(peak_running, bulk.running)
+        consumer.executor.complete()
+        deliver(consumer, bulk, backlog)
+
+    assert not backlog
+    assert consumer.concurrency.increases > 0
+    assert consumer.concurrency.limit > consumer.concurrency.min_limit
+    assert peak_running > 1
+    # Bulk never takes the worker kept for interactive requests
+    assert bulk.capacity(consumer.concurrency.limit) < \
+        consumer.concurrency.limit
+
+
+def test_interactive_request_gets_a_worker_next_to_bulk(consumer):
+    interactive, bulk = consumer.lanes
+    deliver(consumer, bulk, deque(range(10)))
+    assert bulk.running == bulk.capacity(consumer.concurrency.limit)
+
+    consumer.process_message(None, None, None, b'{}', interactive)
+    assert interactive.running == 1
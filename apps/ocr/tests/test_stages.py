@@ -0,0 +1,140 @@
+"""
+Split pipeline (detect -> digits -> text) over the InMemoryBroker
+The models are stubbed; the tests cover task hand-off between stages, the
+reply routing and what the reply carries.
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from src.messaging import stages
+
+BASE_NAME = 'id_card.jpg'
+TEXTS = {'first_name': 'محمد', 'second_name': 'أحمد علي', 'location': 'القاهرة'}
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / BASE_NAME
+    cv2.imwrite(str(path), np.full((64, 96, 3), 200, dtype=np.uint8))
+    return str(path)
+
+
+@pytest.fixture
+def stub_models(tmp_path, monkeypatch):
+    """Stub the detect, digits and text models used by the stages"""
+    calls = []
+
+    def predict_id(path, request_id, image=None):
+        calls.append('detect')
+        assert image is not None
+        save_dir = tmp_path / 'runs' / request_id
+        save_dir.mkdir(parents=True)
+        return [], str(save_dir)
+
+    def save_field_crops(path, save_dir, detections, image=None):
+        for slot in ('1', '2', '3', 'egyptian-id'):
+            crop_dir = os.path.join(save_dir, 'crops', slot)
+            os.makedirs(crop_dir)
+            cv2.imwrite(os.path.join(crop_dir, BASE_NAME),
+                        np.full((16, 32, 3), 255, dtype=np.uint8))
+        return 'detection'
+
+    def extract_digits(image, conf_threshold=0.25, region=None):
+        calls.append('digits')
+        assert image.shape[2] == 3
+        return '29901011234567', []
+
+    def read_text_fields(images):
+        calls.append('text')
+        assert len(images) == len(stages.TEXT_FIELD_KEYS)
+        return dict(TEXTS)
+
+    monkeypatch.setattr(stages, 'predict_id', predict_id)
+    monkeypatch.setattr(stages, 'save_field_crops', save_field_crops)
+    monkeypatch.setattr(stages, 'extract_digits', extract_digits)
+    monkeypatch.setattr(stages, 'read_text_fields', read_text_fields)
+    return calls
+
+
+def run_pipeline(broker, image_path, lane='interactive', frame_index=None):
+    outcome = stages.start_pipeline(image_path,
+                                    'req-1',
+                                    'client.reply',
+                                    'corr-1',
+                                    lane,
+                                    broker.publish,
+                                    frame_index=frame_index)
+    broker.drain()
+    return outcome
+
+
+def test_pipeline_replies_to_client_queue(image_path, stub_models):
+    broker = stages.InMemoryBroker()
+    assert run_pipeline(broker, image_path, frame_index=2) == 'ok'
+
+    assert stub_models == ['detect', 'digits', 'text']
+    assert len(broker.queues['client.reply']) == 1
+    response, correlation_id = broker.queues['client.reply'][0]
+    assert correlation_id == 'corr-1'
+    assert response == {
+        'firstName': TEXTS['first_name'],
+        'lastName': TEXTS['second_name'],
+        'location': TEXTS['location'],
+        'socialSecurityNumber': '29901011234567',
+        'frameIndex': 2
+    }
+
+
+def test_reply_has_no_frame_index_for_single_images(image_path, stub_models):
+    broker = stages.InMemoryBroker()
+    run_pipeline(broker, image_path)
+
+    response, _ = broker.queues['client.reply'][0]
+    assert 'frameIndex' not in response
+
+
+def test_stage_queues_are_drained(image_path, stub_models):
+    broker = stages.InMemoryBroker()
+    run_pipeline(broker, image_path)
+
+    for stage in stages.NEXT_STAGE.values():
+        assert not broker.queues[stages.stage_queue(stage)]
+
+
+@pytest.mark.parametrize('bulk_queues', [True, False])
+def test_bulk_lane_reaches_the_client(image_path, stub_models, monkeypatch,
+                                      bulk_queues):
+    monkeypatch.setattr(stages, 'STAGE_BULK_QUEUES', bulk_queues)
+    broker = stages.InMemoryBroker()
+    run_pipeline(broker, image_path, lane='bulk')
+
+    expected = ('ocr.stage.digits.bulk'
+                if bulk_queues else 'ocr.stage.digits')
+    assert stages.stage_queue('digits', 'bulk') == expected
+    response, correlation_id = broker.queues['client.reply'][0]
+    assert correlation_id == 'corr-1'
+    assert response['socialSecurityNumber'] == '29901011234567'
+
+
+def test_detect_failure_replies_with_error(image_path, stub_models,
+                                           monkeypatch):
+
+    def fail(path, request_id, image=None):
+        raise ValueError('No boxes detected!')
+
+    monkeypatch.setattr(stages, 'predict_id', fail)
+    broker = stages.InMemoryBroker()
+    assert run_pipeline(broker, image_path) == 'error'
+
+    assert list(broker.queues['client.reply']) == [({
+        'error': 'Invalid ID photo'
+    }, 'corr-1')]
+
+
+def test_process_returns_the_matching_reply(image_path, stub_models):
+    broker = stages.InMemoryBroker()
+    assert broker.process(image_path)['location'] == TEXTS['location']
+    assert not broker.queues['local.reply']